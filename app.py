@@ -125,7 +125,8 @@ def _micro_label(text: str) -> None:
 
 def _estimate_cache_key(filters: Dict[str, Any]) -> str:
     payload = json.dumps(filters, sort_keys=True, ensure_ascii=False)
-    return f"estimate:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+    return f"estimate:v2:{digest}"
 
 
 def _estimate_targets(filters: Dict[str, Any]) -> Dict[str, Any]:
@@ -220,7 +221,7 @@ def _parse_ts(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
     try:
-        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
     except ValueError:
         return None
 
@@ -1302,7 +1303,7 @@ def _render_vault() -> None:
                     )
                     with st.spinner("Enriquecendo leads pendentes..."):
                         try:
-                            enriched_results, enrich_stats = asyncio.run(enricher.enrich_batch(leads, run_id))
+                            enriched_results, enrich_stats = enricher.run_batch(leads, run_id)
                         except Exception as exc:
                             storage.update_run(run_id, status="failed")
                             st.error("Falha ao processar o lote de enriquecimento.")
@@ -1310,8 +1311,8 @@ def _render_vault() -> None:
                             enriched_results = []
                             enrich_stats = {"errors_count": len(leads)}
 
+                    storage.upsert_enrichments(enriched_results)
                     for item in enriched_results:
-                        storage.upsert_enrichment(item.get("cnpj"), item)
                         lead = lead_map.get(item.get("cnpj"))
                         if not lead:
                             continue
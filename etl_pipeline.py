@@ -1,6 +1,5 @@
 """Hunter OS v3 - Zero-touch orchestration."""
 
-import asyncio
 import csv
 import io
 import json
@@ -18,7 +17,7 @@ import pandas as pd
 import requests
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
-from modules import cleaning, data_sources, enrichment_async, providers, scoring, storage
+from modules import cleaning, data_sources, enrichment_async, jobs, providers, scoring, storage
 
 STATUS_RUNNING = "RUNNING"
 STATUS_PAUSED = "PAUSED"
@@ -36,8 +35,6 @@ STAGE_COMPLETED = "COMPLETED"
 STAGE_PAUSED = "PAUSED"
 STAGE_FAILED = "FAILED"
 
-_job_registry: Dict[str, Dict[str, Any]] = {}
-
 
 class JobCanceled(Exception):
     pass
@@ -89,8 +86,7 @@ class HunterOrchestrator:
             args=(run_id, filters, cancel_event, False),
             daemon=True,
         )
-        _job_registry[run_id] = {"thread": thread, "cancel_event": cancel_event}
-        thread.start()
+        jobs.register_job(run_id, thread, cancel_event)
         return run_id
 
     def resume_job(self, run_id: str) -> Optional[str]:
@@ -108,19 +104,18 @@ class HunterOrchestrator:
             args=(run_id, filters, cancel_event, True),
             daemon=True,
         )
-        _job_registry[run_id] = {"thread": thread, "cancel_event": cancel_event}
-        thread.start()
+        jobs.register_job(run_id, thread, cancel_event)
         return run_id
 
     def cancel_job(self, run_id: str) -> None:
-        job = _job_registry.get(run_id)
+        job = jobs.get_job(run_id)
         if job:
             job["cancel_event"].set()
         storage.update_hunter_run(run_id, status=STATUS_PAUSED, current_stage=STAGE_PAUSED)
         storage.log_event("warning", "v3_run_paused", {"run_id": run_id})
 
     def is_running(self, run_id: str) -> bool:
-        job = _job_registry.get(run_id)
+        job = jobs.get_job(run_id)
         if not job:
             return False
         return job["thread"].is_alive()
@@ -559,10 +554,9 @@ class HunterOrchestrator:
             exclude_mei=filters.get("excluir_mei", True),
             min_repeat=int(filters.get("telefone_repeat_threshold") or 5),
             return_stats=True,
+            score_v1=scoring.score_v1,
         )
         storage.upsert_socios_from_leads(cleaned)
-        for lead in cleaned:
-            lead["score_v1"] = scoring.score_v1(lead)
         storage.upsert_leads_clean(cleaned)
         storage.update_hunter_run(run_id, processed_count=len(cleaned), total_leads=len(cleaned))
         storage.log_event("info", "v3_cleaned", {"run_id": run_id, **stats})
@@ -577,7 +571,7 @@ class HunterOrchestrator:
             to_enrich = sorted_clean[:top_n]
             provider = providers.select_provider(filters.get("provider") or "serper")
             try:
-                enrichments = asyncio.run(
+                enrichments = enrichment_async.run(
                     enrichment_async.enrich_leads_hybrid(
                         to_enrich,
                         provider=provider,
@@ -587,8 +581,7 @@ class HunterOrchestrator:
                 )
             except Exception as exc:
                 storage.log_event("error", "v3_enrich_failed", {"run_id": run_id, "error": str(exc)})
-            for item in enrichments:
-                storage.upsert_enrichment(item.get("cnpj"), item)
+            storage.upsert_enrichments(enrichments)
 
         enrichment_map = {item.get("cnpj"): item for item in enrichments}
         for lead in cleaned:
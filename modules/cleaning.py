@@ -5,7 +5,7 @@ Cleaning and dedup flags for Hunter OS.
 import json
 import re
 from collections import Counter
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
 
 CNAE_PRIORITARIOS = {
@@ -234,6 +234,7 @@ def clean_batch(
     exclude_mei: bool = True,
     min_repeat: int = 5,
     return_stats: bool = False,
+    score_v1: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> Any:
     cleaned = []
     removed_mei = 0
@@ -250,6 +251,9 @@ def clean_batch(
     apply_repeated_phone_flags(cleaned, min_count=min_repeat)
     for lead in cleaned:
         lead["contact_quality"] = contact_quality(lead["flags"])
+        # Scored here (flags are final) so callers don't walk the batch again.
+        if score_v1 is not None:
+            lead["score_v1"] = score_v1(lead)
 
     if return_stats:
         stats = {
@@ -8,7 +8,7 @@ import json
 import os
 import re
 import time
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import backoff
 import pandas as pd
@@ -517,8 +517,10 @@ def normalize_export_row(row: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def parse_export_csv(file_path: str) -> List[Dict[str, Any]]:
-    leads = []
+EXPORT_CSV_CHUNK_SIZE = 5000
+
+
+def iter_export_csv(file_path: str, chunk_size: int = EXPORT_CSV_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
     with open(file_path, "r", encoding="utf-8-sig", newline="") as handle:
         sample = handle.read(4096)
         handle.seek(0)
@@ -527,9 +529,14 @@ def parse_export_csv(file_path: str) -> List[Dict[str, Any]]:
         except csv.Error:
             dialect = csv.excel
         reader = csv.DictReader(handle, dialect=dialect)
+        chunk: List[Dict[str, Any]] = []
         for row in reader:
-            leads.append(normalize_export_row(row))
-    return leads
+            chunk.append(normalize_export_row(row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
 
 
 def parse_excel_file(file_path: str, cnpj_column: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -1,34 +1,80 @@
 """Async enrichment pipeline."""
 
 import asyncio
+import atexit
 import hashlib
+import html as html_lib
+import itertools
 import json
 import logging
 import os
 import random
 import re
 import socket
+import threading
 import time
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Mapping, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 import aiohttp
-from bs4 import BeautifulSoup
+import backoff
 from fake_useragent import UserAgent
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:  # pragma: no cover - fallback when optional deps are missing
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
+try:
+    import aiodns  # noqa: F401 - only needed by aiohttp.AsyncResolver
+    _AIODNS_AVAILABLE = True
+except Exception:  # pragma: no cover - fallback when optional deps are missing
+    _AIODNS_AVAILABLE = False
+
+try:
+    import uvloop
+    _UVLOOP_AVAILABLE = True
+except Exception:  # pragma: no cover - uvloop is not shipped for Windows
+    uvloop = None
+    _UVLOOP_AVAILABLE = False
+
 from modules import storage, providers, person_intelligence
 from modules.providers import ProviderResponseError, SearchProvider
-from modules.tech_detection import OptionalRenderedDetector, TechSniperDetector
+from modules.tech_detection import OptionalRenderedDetector, TechSniperDetector, read_capped_text
 
-CONTACT_PATHS = ["/contato", "/fale-conosco", "/contact", "/contato/", "/fale-conosco/"]
+# Trailing-slash variants are left out: servers redirect them and the session follows redirects.
+CONTACT_PATHS = ("/contato", "/fale-conosco", "/contact")
 
 logger = logging.getLogger("hunter")
 
+CONNECTOR_LIMIT_PER_HOST = 8
+CONNECTOR_KEEPALIVE_SEC = 30
+# Drives both the connector's resolver cache and the _dns_valid answers.
+DNS_CACHE_TTL_SEC = int(os.getenv("DNS_CACHE_TTL", "300"))
+DNS_RETRY_TTL_SEC = 30
+DNS_CACHE_MAX_ENTRIES = 4096
+DNS_PREWARM_TIMEOUT_SEC = 10
+CONTENT_CACHE_MAX_ENTRIES = 512
+
+PROGRESS_EMIT_EVERY = 10
+PROGRESS_EMIT_INTERVAL_SEC = 5
+LOG_FLUSH_MAX = 50
+
 DISCOVERY_TOP_N = 8
 DISCOVERY_MIN_SCORE = 60
 DISCOVERY_TIMEOUT_SEC = 3
+FETCH_MAX_TRIES = 3
+FETCH_BACKOFF_FACTOR = 0.5
+FETCH_BACKOFF_MAX = 10.0
+RETRYABLE_FETCH_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 EXCLUDED_DOMAIN_KEYWORDS = {
     "econodata",
@@ -85,62 +131,271 @@ LEGAL_SUFFIXES = [
 ]
 
 
+@dataclass(frozen=True, slots=True)
+class EnrichmentSettings:
+    serper_concurrency: Optional[int]
+    max_rps: int
+    backoff_base: float
+    backoff_max: float
+    enable_playwright: bool
+    playwright_timeout_ms: int
+    evolution_base_url: Optional[str]
+    evolution_api_key: Optional[str]
+    avatar_cache_dir: str
+    enable_email_finder: bool
+    enable_holehe: bool
+
+    @classmethod
+    def from_env(cls) -> "EnrichmentSettings":
+        serper_concurrency = os.getenv("SERPER_CONCURRENCY")
+        return cls(
+            serper_concurrency=int(serper_concurrency) if serper_concurrency else None,
+            max_rps=max(1, int(os.getenv("SERPER_MAX_RPS", "5"))),
+            backoff_base=float(os.getenv("PROVIDER_BACKOFF_BASE", "1.5")),
+            backoff_max=float(os.getenv("PROVIDER_BACKOFF_MAX", "60")),
+            enable_playwright=os.getenv("ENABLE_PLAYWRIGHT", "0") == "1",
+            playwright_timeout_ms=int(os.getenv("PLAYWRIGHT_TIMEOUT_MS", "8000")),
+            evolution_base_url=os.getenv("EVOLUTION_API_URL"),
+            evolution_api_key=os.getenv("EVOLUTION_API_KEY"),
+            avatar_cache_dir=os.getenv("AVATAR_CACHE_DIR", "uploads/avatars"),
+            enable_email_finder=os.getenv("ENABLE_EMAIL_FINDER", "0") == "1",
+            enable_holehe=os.getenv("ENABLE_HOLEHE", "0") == "1",
+        )
+
+    def build_person_intel(self) -> person_intelligence.PersonIntelligence:
+        return person_intelligence.PersonIntelligence(
+            evolution_base_url=self.evolution_base_url,
+            evolution_api_key=self.evolution_api_key,
+            avatar_cache_dir=self.avatar_cache_dir,
+            enable_email_finder=self.enable_email_finder,
+            enable_holehe=self.enable_holehe,
+        )
+
+
 class RateLimiter:
     def __init__(self, rate_per_sec: int, burst: Optional[int] = None):
         self.rate = max(1, int(rate_per_sec))
         self.capacity = burst or self.rate
         self.tokens = float(self.capacity)
         self.updated_at = time.monotonic()
-        self._lock = asyncio.Lock()
 
     async def acquire(self) -> None:
-        while True:
-            async with self._lock:
-                now = time.monotonic()
-                elapsed = now - self.updated_at
-                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
-                self.updated_at = now
-                if self.tokens >= 1:
-                    self.tokens -= 1
-                    return
-                wait_time = (1 - self.tokens) / self.rate
-            await asyncio.sleep(wait_time)
+        # Single event loop: the refill and reservation below run without an
+        # await in between, so no lock is needed. Tokens may go negative; each
+        # caller owns its slot and sleeps until it is due (FIFO).
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self.tokens / self.rate)
+        except asyncio.CancelledError:
+            self.tokens += 1
+            raise
+
+
+def _build_connector(concurrency: int) -> aiohttp.TCPConnector:
+    return aiohttp.TCPConnector(
+        limit=max(1, concurrency) * 4,
+        limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL_SEC,
+        keepalive_timeout=CONNECTOR_KEEPALIVE_SEC,
+        resolver=aiohttp.AsyncResolver() if _AIODNS_AVAILABLE else None,
+    )
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    if _UVLOOP_AVAILABLE and os.getenv("ENABLE_UVLOOP", "1") == "1":
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(coro: Awaitable[Any]) -> Any:
+    with asyncio.Runner(loop_factory=new_event_loop) as runner:
+        return runner.run(coro)
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+# Connectors (keep-alive pools + DNS cache) shared by every batch on the background loop, per limit.
+# Only touched from the loop thread.
+_background_connectors: Dict[int, aiohttp.TCPConnector] = {}
+
+
+_background_thread: Optional[threading.Thread] = None
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop, _background_thread
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = new_event_loop()
+            _background_thread = threading.Thread(target=loop.run_forever, name="hunter-async", daemon=True)
+            _background_thread.start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_in_background(coro: Awaitable[Any]) -> Any:
+    # Unlike run(), the loop outlives the call, so connection pools stay warm between batches.
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+def _shared_connector(concurrency: int) -> aiohttp.TCPConnector:
+    connector = _background_connectors.get(concurrency)
+    if connector is None or connector.closed:
+        connector = _build_connector(concurrency)
+        _background_connectors[concurrency] = connector
+    return connector
+
+
+async def _close_background_connectors() -> None:
+    connectors = list(_background_connectors.values())
+    _background_connectors.clear()
+    for connector in connectors:
+        await connector.close()
+
+
+def _stop_background_loop() -> None:
+    global _background_loop, _background_thread
+    with _background_loop_lock:
+        loop, thread = _background_loop, _background_thread
+        _background_loop = _background_thread = None
+    if loop is None:
+        return
+    # The connectors live on the loop thread, so they are closed there before the loop stops.
+    try:
+        asyncio.run_coroutine_threadsafe(_close_background_connectors(), loop).result(timeout=5)
+    except Exception as exc:
+        logger.warning("Closing background connectors failed: %s", exc)
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    if not loop.is_running():
+        loop.close()
+
+
+atexit.register(_stop_background_loop)
+
+
+async def _run_bounded(
+    items: List[Any],
+    worker: Callable[[Any], Awaitable[None]],
+    concurrency: int,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> None:
+    if not items:
+        return
+    workers = max(1, min(int(concurrency), len(items)))
+    # Workers pull from one shared iterator; next() never awaits, so no item is handed out twice.
+    pending = iter(items)
+
+    async def _consume() -> None:
+        for item in pending:
+            if should_stop is not None and should_stop():
+                return
+            await worker(item)
+
+    async with asyncio.TaskGroup() as group:
+        for _ in range(workers):
+            group.create_task(_consume())
+
+
+async def _coalesced(
+    inflight: Dict[str, "asyncio.Future[Any]"],
+    key: str,
+    factory: Callable[[], Awaitable[Any]],
+) -> Any:
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        inflight[key] = task
+    return await asyncio.shield(task)
+
+
+def _start_avatar_fetch(
+    person_intel: person_intelligence.PersonIntelligence,
+    session: aiohttp.ClientSession,
+    lead: Dict[str, Any],
+) -> Optional["asyncio.Task[Optional[str]]"]:
+    if not person_intel.has_socios(lead):
+        return None
+    return asyncio.create_task(person_intel.fetch_lead_avatar(session, lead))
 
 
 def _hash_key(value: str) -> str:
-    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
 
+def _json_loads(raw: Any, default: Any) -> Any:
+    if not raw:
+        return default
+    try:
+        if _ORJSON_AVAILABLE:
+            return orjson.loads(raw)
+        return json.loads(raw)
+    except Exception:
+        return default
 
-def _has_form(html: str) -> bool:
-    return "<form" in html.lower()
 
+_HTML_SIGNALS_RE = re.compile(r"(?P<form><form)|(?P<wa>wa\.me/|api\.whatsapp\.com)", re.IGNORECASE)
 
-def _has_whatsapp_link(html: str) -> bool:
-    return "wa.me/" in html or "api.whatsapp.com" in html
+
+def _scan_html_signals(html: str) -> Tuple[bool, bool]:
+    has_form = False
+    has_whatsapp = False
+    if not html:
+        return has_form, has_whatsapp
+    for match in _HTML_SIGNALS_RE.finditer(html):
+        if match.lastgroup == "form":
+            has_form = True
+        else:
+            has_whatsapp = True
+        if has_form and has_whatsapp:
+            break
+    return has_form, has_whatsapp
+
+
+_SANITIZE_PATTERNS = [
+    (re.compile(r"((?:api_key|apikey|access_token|token)=)[^&\s]+", re.IGNORECASE), r"\1***"),
+    (re.compile(r"(x-api-key[\"']?\s*[:=]\s*[\"']?)[^\"'\s,}]+", re.IGNORECASE), r"\1***"),
+]
+
+_PROVIDER_HINTS: Dict[str, List[Tuple[Optional["re.Pattern[str]"], str]]] = {
+    "serper": [
+        (
+            re.compile(r"text/html|nao-json|lander", re.IGNORECASE),
+            "Serper.dev retornou HTML (lander/bloqueio). Verifique plano/chave no painel "
+            "ou confirme se a chave tem permissao ativa.",
+        ),
+        (None, "Verifique a chave/plano no painel do Serper.dev."),
+    ],
+}
 
 
 def _sanitize_error_message(message: str) -> str:
     if not message:
         return ""
-    return re.sub(r"(api_key=)[^&\\s]+", r"\\1***", message, flags=re.IGNORECASE)
+    for pattern, replacement in _SANITIZE_PATTERNS:
+        message = pattern.sub(replacement, message)
+    return message
 
 
 def _provider_hint(provider_name: str, message: str) -> Optional[str]:
-    provider = (provider_name or "").lower()
-    msg = (message or "").lower()
-    if provider == "serper":
-        if "text/html" in msg or "nao-json" in msg or "lander" in msg:
-            return (
-                "Serper.dev retornou HTML (lander/bloqueio). Verifique plano/chave no painel "
-                "ou confirme se a chave tem permissao ativa."
-            )
-        return "Verifique a chave/plano no painel do Serper.dev."
+    hints = _PROVIDER_HINTS.get((provider_name or "").lower())
+    if not hints:
+        return None
+    msg = message or ""
+    for pattern, hint in hints:
+        if pattern is None or pattern.search(msg):
+            return hint
     return None
 
 
 def _normalize_text(text: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9 ]+", " ", (text or "").lower())
-    return re.sub(r"\s+", " ", cleaned).strip()
+    return " ".join(_NON_ALNUM_RE.sub(" ", (text or "").lower()).split())
 
 
 def _simplify_legal_name(name: str) -> str:
@@ -157,10 +412,7 @@ def _extract_socios_names_from_lead(lead: Dict[str, Any]) -> List[str]:
         if not raw:
             continue
         if isinstance(raw, str):
-            try:
-                parsed = json.loads(raw)
-            except Exception:
-                parsed = raw
+            parsed = _json_loads(raw, raw)
             raw_items = parsed if isinstance(parsed, list) else [parsed]
         elif isinstance(raw, list):
             raw_items = raw
@@ -179,6 +431,20 @@ def _extract_socios_names_from_lead(lead: Dict[str, Any]) -> List[str]:
     return list(dict.fromkeys(names))[:5]
 
 
+def _merge_unique(base: List[str], extra: List[str], limit: int = 5) -> List[str]:
+    merged: List[str] = []
+    seen: set = set()
+    for items in (base, extra):
+        for item in items:
+            if item in seen:
+                continue
+            seen.add(item)
+            merged.append(item)
+            if len(merged) >= limit:
+                return merged
+    return merged
+
+
 def _extract_domain(url: str) -> str:
     if not url:
         return ""
@@ -193,8 +459,8 @@ def _is_excluded_domain(domain: str) -> bool:
     return any(keyword in domain for keyword in EXCLUDED_DOMAIN_KEYWORDS)
 
 
-def _is_parked_domain(html: str, headers: Dict[str, str]) -> bool:
-    blob = (html or "").lower()
+def _is_parked_domain(html: str, headers: Dict[str, str], html_lower: Optional[str] = None) -> bool:
+    blob = html_lower if html_lower is not None else (html or "").lower()
     header_blob = " ".join([f"{k}: {v}" for k, v in headers.items()]).lower()
     if any(hint in blob for hint in PARKED_HINTS):
         return True
@@ -240,6 +506,61 @@ def _candidate_from_url(
     }
 
 
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+_META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""([a-zA-Z_:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+_HEAD_END_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+
+
+def _head_html(html: str) -> str:
+    if not html:
+        return ""
+    match = _HEAD_END_RE.search(html)
+    return html[: match.start()] if match else html
+
+
+@lru_cache(maxsize=4096)
+def _contact_urls(site: str) -> Tuple[str, ...]:
+    parts = urlparse(site)
+    if not parts.scheme or not parts.netloc:
+        return tuple(dict.fromkeys(urljoin(site, path) for path in CONTACT_PATHS))
+    # Every contact path is absolute, so joining only ever keeps scheme://netloc.
+    base = f"{parts.scheme}://{parts.netloc}"
+    return tuple(base + path for path in CONTACT_PATHS)
+
+
+def _search_cache_key(query: str) -> str:
+    return f"search:v2:{_hash_key(query)}"
+
+
+def _extract_title(html: str) -> str:
+    if not html:
+        return ""
+    match = _TITLE_RE.search(html)
+    if not match or "<" in match.group(1):
+        return ""
+    return html_lib.unescape(match.group(1)).strip()
+
+
+def _extract_meta(html: str) -> Dict[Tuple[str, str], str]:
+    metas: Dict[Tuple[str, str], str] = {}
+    if not html:
+        return metas
+    for tag in _META_TAG_RE.findall(html):
+        attrs = {
+            key.lower(): first or second or third
+            for key, first, second, third in _ATTR_RE.findall(tag)
+        }
+        content = attrs.get("content")
+        if not content:
+            continue
+        for attr in ("name", "property"):
+            value = (attrs.get(attr) or "").lower()
+            if value:
+                metas.setdefault((attr, value), html_lib.unescape(content).strip())
+    return metas
+
+
 def _html_contains_contact(html_lower: str) -> bool:
     return any(term in html_lower for term in ("contato", "fale conosco", "whatsapp", "telefone"))
 
@@ -261,21 +582,18 @@ def score_website_candidate(
     domain = candidate.get("domain") or _extract_domain(candidate.get("url") or "")
     if _is_excluded_domain(domain):
         return 0, ["excluded_domain"]
-    if _is_parked_domain(html, headers):
+    # One lowercase copy of the page serves the parked check and every keyword test below.
+    html_lower = (html or "").lower()
+    if _is_parked_domain(html, headers, html_lower):
         return 0, ["parked_domain"]
 
     score += 5
     reasons.append("not_aggregator")
 
-    html_lower = (html or "").lower()
     title = candidate.get("title") or ""
-    soup = BeautifulSoup(html, "html.parser")
-    html_title = (soup.title.string or "").strip() if soup.title else ""
+    html_title = _extract_title(html)
     title = html_title or title
-    og_site = ""
-    meta_site = soup.find("meta", attrs={"property": "og:site_name"})
-    if meta_site and meta_site.get("content"):
-        og_site = meta_site.get("content", "").strip()
+    og_site = _extract_meta(html).get(("property", "og:site_name"), "")
 
     brand = (lead.get("nome_fantasia") or "") or _simplify_legal_name(lead.get("razao_social") or "")
     brand_norm = _normalize_text(brand)
@@ -318,6 +636,54 @@ def score_website_candidate(
     return score, reasons
 
 
+_RESULT_TEMPLATE: Dict[str, Any] = {
+    "cnpj": None,
+    "run_id": None,
+    "site": None,
+    "instagram": None,
+    "linkedin_company": None,
+    "google_maps_url": None,
+    "has_contact_page": False,
+    "has_form": False,
+    "tech_score": 0,
+    "tech_confidence": 0,
+    "has_marketing": False,
+    "has_analytics": False,
+    "has_ecommerce": False,
+    "has_chat": False,
+    "fetched_url": None,
+    "fetch_status": None,
+    "fetch_ms": 0,
+    "rendered_used": False,
+    "contact_quality": None,
+    "website_confidence": 0,
+    "discovery_method": "",
+    "search_term_used": "",
+    "candidates_considered": 0,
+    "excluded_candidates_count": 0,
+    "notes": "",
+    "wealth_score": 0,
+    "avatar_url": None,
+}
+
+
+def _new_result(lead: Dict[str, Any], run_id: Optional[str]) -> Dict[str, Any]:
+    result = _RESULT_TEMPLATE.copy()
+    result["cnpj"] = lead.get("cnpj")
+    result["run_id"] = run_id
+    result["google_maps_url"] = (lead.get("flags") or {}).get("google_maps_url")
+    result["contact_quality"] = lead.get("contact_quality")
+    # Containers are created per lead so no two results share them.
+    result["linkedin_people"] = []
+    result["tech_stack"] = {}
+    result["signals"] = {}
+    result["golden_techs_found"] = []
+    result["tech_sources"] = {}
+    result["website_match_reasons"] = []
+    result["person_json"] = {}
+    return result
+
+
 class AsyncEnricher:
     def __init__(
         self,
@@ -325,29 +691,82 @@ class AsyncEnricher:
         concurrency: int = 10,
         timeout: int = 5,
         cache_ttl_hours: int = 24,
+        settings: Optional[EnrichmentSettings] = None,
     ):
         self.provider = provider
-        max_concurrency = int(os.getenv("SERPER_CONCURRENCY", str(concurrency)))
+        self.settings = settings or EnrichmentSettings.from_env()
+        max_concurrency = self.settings.serper_concurrency or concurrency
         self.concurrency = max(1, min(concurrency, max_concurrency, 20))
         self.timeout = timeout
+        self._page_timeout = aiohttp.ClientTimeout(total=timeout)
         self.cache_ttl_hours = cache_ttl_hours
         self.detector = TechSniperDetector(timeout=timeout, cache_ttl_hours=cache_ttl_hours)
-        enable_playwright = os.getenv("ENABLE_PLAYWRIGHT", "0") == "1"
         self.rendered_detector = OptionalRenderedDetector(
-            enabled=enable_playwright,
-            timeout_ms=int(os.getenv("PLAYWRIGHT_TIMEOUT_MS", "8000")),
+            enabled=self.settings.enable_playwright,
+            timeout_ms=self.settings.playwright_timeout_ms,
         )
-        self.max_rps = max(1, int(os.getenv("SERPER_MAX_RPS", "5")))
-        self.backoff_base = float(os.getenv("PROVIDER_BACKOFF_BASE", "1.5"))
-        self.backoff_max = float(os.getenv("PROVIDER_BACKOFF_MAX", "60"))
+        self.max_rps = self.settings.max_rps
+        self.backoff_base = self.settings.backoff_base
+        self.backoff_max = self.settings.backoff_max
         self.rate_limiter = RateLimiter(self.max_rps)
-        self.person_intel = person_intelligence.PersonIntelligence(
-            evolution_base_url=os.getenv("EVOLUTION_API_URL"),
-            evolution_api_key=os.getenv("EVOLUTION_API_KEY"),
-            avatar_cache_dir=os.getenv("AVATAR_CACHE_DIR", "uploads/avatars"),
-            enable_email_finder=os.getenv("ENABLE_EMAIL_FINDER", "0") == "1",
-            enable_holehe=os.getenv("ENABLE_HOLEHE", "0") == "1",
-        )
+        self.person_intel = self.settings.build_person_intel()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._search_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._search_writes: Dict[str, Dict[str, Any]] = {}
+        self._search_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._content_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._contact_url_by_host: Dict[str, Optional[str]] = {}
+
+    def _analyze_content_cached(self, html: str) -> Dict[str, Any]:
+        # Contact pages built from the same template hash alike; detect once per body.
+        key = _hash_key(html)
+        analysis = self._content_cache.get(key)
+        if analysis is not None:
+            self._content_cache.move_to_end(key)
+            return analysis
+        analysis = self.detector.analyze_content(html, {}, [])
+        self._content_cache[key] = analysis
+        if len(self._content_cache) > CONTENT_CACHE_MAX_ENTRIES:
+            self._content_cache.popitem(last=False)
+        return analysis
+
+    async def __aenter__(self) -> "AsyncEnricher":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            shared = loop is _background_loop
+            self._session = aiohttp.ClientSession(
+                connector=_shared_connector(self.concurrency) if shared else _build_connector(self.concurrency),
+                connector_owner=not shared,
+                timeout=aiohttp.ClientTimeout(sock_connect=3, sock_read=self.timeout, total=self.timeout + 2),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        session = self._session
+        self._session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def run_batch(
+        self,
+        leads: List[Dict[str, Any]],
+        run_id: str,
+        cancel_event: Optional[asyncio.Event] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        async def _run() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            async with self:
+                return await self.enrich_batch(leads, run_id, cancel_event=cancel_event)
+
+        return run_in_background(_run())
 
     def _backoff_seconds(self, attempt: int) -> float:
         base = self.backoff_base ** max(1, attempt)
@@ -356,22 +775,106 @@ class AsyncEnricher:
 
     async def _fetch_html(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
         try:
-            async with session.get(url, timeout=self.timeout) as resp:
-                if resp.status >= 400:
-                    return None
-                return await resp.text()
+            page = await _fetch_page(session, url, timeout=self._page_timeout)
         except Exception:
             return None
+        if page["status"] >= 400:
+            return None
+        return page["html"]
+
+    async def _page_exists(self, session: aiohttp.ClientSession, url: str) -> bool:
+        try:
+            async with session.get(url, timeout=self._page_timeout) as resp:
+                return resp.status < 400
+        except Exception:
+            return False
+
+    async def _probe_contact_page(
+        self,
+        session: aiohttp.ClientSession,
+        site: str,
+        read_body: bool = True,
+    ) -> Optional[str]:
+        host = urlparse(site).netloc.lower()
+        if host in self._contact_url_by_host:
+            # Leads sharing a host (franchises, marketplaces) reuse the first lookup's answer.
+            urls: Tuple[str, ...] = ()
+            known = self._contact_url_by_host[host]
+            if known is not None:
+                urls = (known,)
+        else:
+            urls = _contact_urls(site)
+        if not urls:
+            return None
+
+        # Only a few deduplicated paths, so all of them go out at once; the connector caps per-host sockets.
+        async def _probe(url: str) -> Tuple[str, Optional[str]]:
+            if read_body:
+                return url, await self._fetch_html(session, url)
+            return url, url if await self._page_exists(session, url) else None
+
+        tasks = [asyncio.create_task(_probe(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, html_contact = await next_done
+                if html_contact:
+                    self._contact_url_by_host[host] = url
+                    return html_contact
+            self._contact_url_by_host.setdefault(host, None)
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
     async def _search(self, session: aiohttp.ClientSession, query: str) -> Dict[str, Any]:
-        cache_key = f"search:{_hash_key(query)}"
-        cached = storage.cache_get(cache_key)
+        cache_key = _search_cache_key(query)
+        search_cache = self._search_cache
+        if search_cache is None:
+            cached = await asyncio.to_thread(storage.cache_get, cache_key)
+            if cached:
+                return cached
+            data = await self._provider_search(session, query)
+            await asyncio.to_thread(storage.cache_set, cache_key, data, self.cache_ttl_hours)
+            return data
+        cached = search_cache.get(cache_key)
         if cached:
             return cached
+        writes = self._search_writes
+
+        async def _fetch() -> Dict[str, Any]:
+            data = await self._provider_search(session, query)
+            search_cache[cache_key] = data
+            writes[cache_key] = data
+            return data
+
+        # Branches and franchises repeat the same query; only the first lead pays for it.
+        return await _coalesced(self._search_inflight, cache_key, _fetch)
+
+    async def _provider_search(self, session: aiohttp.ClientSession, query: str) -> Dict[str, Any]:
         await self.rate_limiter.acquire()
-        data = await self.provider.search(session, query)
-        storage.cache_set(cache_key, data, ttl_hours=self.cache_ttl_hours)
-        return data
+        return await self.provider.search(session, query)
+
+    def _batch_search_keys(self, leads: List[Dict[str, Any]]) -> List[str]:
+        keys: List[str] = []
+        for lead in leads:
+            keys.extend(_search_cache_key(query) for query in _build_search_queries(lead))
+            razao = (lead.get("razao_social") or lead.get("nome_fantasia") or "").strip()
+            for name in _extract_socios_names_from_lead(lead):
+                keys.append(_search_cache_key(f'site:linkedin.com/in/ "{name}" "{razao}"'.strip()))
+        return keys
+
+    async def _flush_search_cache(self) -> None:
+        writes, self._search_writes = self._search_writes, {}
+        inflight, self._search_inflight = self._search_inflight, {}
+        self._search_cache = None
+        for task in inflight.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+        if writes:
+            await asyncio.to_thread(storage.cache_mset, writes, self.cache_ttl_hours)
 
     async def _search_linkedin_people(
         self,
@@ -391,7 +894,7 @@ class AsyncEnricher:
                 search_data = await self._search(session, query)
             except ProviderResponseError:
                 continue
-            links = search_data.get("linkedin_people", []) or []
+            links = list(search_data.get("linkedin_people") or [])
             for item in search_data.get("candidates", []) or []:
                 url = item.get("url") or item.get("link")
                 if url and "linkedin.com/in/" in url:
@@ -416,15 +919,9 @@ class AsyncEnricher:
         linkedin_company = None
         linkedin_people: List[str] = []
 
-        emails = lead.get("emails_norm") or []
-        if isinstance(emails, str):
-            try:
-                emails = json.loads(emails)
-            except Exception:
-                emails = [emails]
-        email = emails[0] if emails else lead.get("email")
+        email = _pick_email(lead)
         domain = _email_domain(email)
-        if domain and not _is_generic_email(email) and await _dns_valid(domain):
+        if domain and domain not in GENERIC_EMAIL_DOMAINS and await _dns_valid(domain):
             probe_start = time.time()
             for url in [f"https://{domain}", f"http://{domain}", f"https://www.{domain}"]:
                 fetch = await _fetch_candidate_html(session, url, timeout_sec=DISCOVERY_TIMEOUT_SEC)
@@ -557,132 +1054,107 @@ class AsyncEnricher:
         }
 
     async def _enrich_one(self, session: aiohttp.ClientSession, lead: Dict[str, Any], run_id: str) -> Dict[str, Any]:
-        result = {
-            "cnpj": lead.get("cnpj"),
-            "run_id": run_id,
-            "site": None,
-            "instagram": None,
-            "linkedin_company": None,
-            "linkedin_people": [],
-            "google_maps_url": lead.get("flags", {}).get("google_maps_url"),
-            "has_contact_page": False,
-            "has_form": False,
-            "tech_stack": {},
-            "tech_score": 0,
-            "tech_confidence": 0,
-            "has_marketing": False,
-            "has_analytics": False,
-            "has_ecommerce": False,
-            "has_chat": False,
-            "signals": {},
-            "golden_techs_found": [],
-            "tech_sources": {},
-            "fetched_url": None,
-            "fetch_status": None,
-            "fetch_ms": 0,
-            "rendered_used": False,
-            "cache_hit": False,
-            "contact_quality": lead.get("contact_quality"),
-            "website_confidence": 0,
-            "discovery_method": "",
-            "search_term_used": "",
-            "candidates_considered": 0,
-            "website_match_reasons": [],
-            "excluded_candidates_count": 0,
-            "notes": "",
-            "wealth_score": 0,
-            "avatar_url": None,
-            "person_json": {},
-        }
-        discovery = await self._discover_website(session, lead)
-        result.update(
-            {
-                "site": discovery.get("website_url"),
-                "website_confidence": discovery.get("website_confidence", 0),
-                "discovery_method": discovery.get("discovery_method", ""),
-                "search_term_used": discovery.get("search_term_used", ""),
-                "candidates_considered": discovery.get("candidates_considered", 0),
-                "website_match_reasons": discovery.get("website_match_reasons", []),
-                "excluded_candidates_count": discovery.get("excluded_candidates_count", 0),
-                "instagram": discovery.get("instagram"),
-                "linkedin_company": discovery.get("linkedin_company"),
-                "linkedin_people": discovery.get("linkedin_people", []),
-            }
-        )
+        result = _new_result(lead, run_id)
+        result["cache_hit"] = False
+        # The WhatsApp avatar lookup only needs the lead, so overlap it with discovery and detection.
+        avatar_task = _start_avatar_fetch(self.person_intel, session, lead)
+        try:
+            discovery = await self._discover_website(session, lead)
+            result.update(
+                {
+                    "site": discovery.get("website_url"),
+                    "website_confidence": discovery.get("website_confidence", 0),
+                    "discovery_method": discovery.get("discovery_method", ""),
+                    "search_term_used": discovery.get("search_term_used", ""),
+                    "candidates_considered": discovery.get("candidates_considered", 0),
+                    "website_match_reasons": discovery.get("website_match_reasons", []),
+                    "excluded_candidates_count": discovery.get("excluded_candidates_count", 0),
+                    "instagram": discovery.get("instagram"),
+                    "linkedin_company": discovery.get("linkedin_company"),
+                    "linkedin_people": discovery.get("linkedin_people", []),
+                }
+            )
 
-        site = result.get("site")
-        if site:
-            detection = await self.detector.detect(site, session, return_html=True)
-            html = detection.pop("_html", "")
-            if self.rendered_detector.enabled and not detection.get("cache_hit"):
-                detection = await self.rendered_detector.detect(site, self.detector, detection)
-            result["tech_score"] = detection.get("tech_score", 0)
-            result["tech_confidence"] = detection.get("confidence", 0)
-            result["has_marketing"] = detection.get("has_marketing", False)
-            result["has_analytics"] = detection.get("has_analytics", False)
-            result["has_ecommerce"] = detection.get("has_ecommerce", False)
-            result["has_chat"] = detection.get("has_chat", False)
-            result["signals"] = detection.get("signals", {})
-            result["golden_techs_found"] = detection.get("golden_techs_found", [])
-            result["tech_sources"] = detection.get("tech_sources", {})
-            result["fetched_url"] = detection.get("fetched_url")
-            result["fetch_status"] = detection.get("fetch_status")
-            result["fetch_ms"] = detection.get("fetch_ms") or 0
-            result["rendered_used"] = detection.get("rendered_used", False)
-            result["cache_hit"] = detection.get("cache_hit", False)
-            if detection.get("error"):
-                result["notes"] = detection.get("error")
-            detected_stack = detection.get("detected_stack", [])
-            has_whatsapp_link = detection.get("has_whatsapp_link", False)
-            if html:
-                result["has_form"] = _has_form(html)
-                has_whatsapp_link = has_whatsapp_link or _has_whatsapp_link(html)
-            result["tech_stack"] = {
-                "detected_stack": detected_stack,
-                "has_whatsapp_link": has_whatsapp_link,
-            }
+            site = result.get("site")
+            if site:
+                detection = await self.detector.detect(site, session, return_html=True)
+                html = detection.pop("_html", "")
+                if self.rendered_detector.enabled and not detection.get("cache_hit"):
+                    detection = await self.rendered_detector.detect(site, self.detector, detection)
+                result["tech_score"] = detection.get("tech_score", 0)
+                result["tech_confidence"] = detection.get("confidence", 0)
+                result["has_marketing"] = detection.get("has_marketing", False)
+                result["has_analytics"] = detection.get("has_analytics", False)
+                result["has_ecommerce"] = detection.get("has_ecommerce", False)
+                result["has_chat"] = detection.get("has_chat", False)
+                result["signals"] = detection.get("signals", {})
+                result["golden_techs_found"] = detection.get("golden_techs_found", [])
+                result["tech_sources"] = detection.get("tech_sources", {})
+                result["fetched_url"] = detection.get("fetched_url")
+                result["fetch_status"] = detection.get("fetch_status")
+                result["fetch_ms"] = detection.get("fetch_ms") or 0
+                result["rendered_used"] = detection.get("rendered_used", False)
+                result["cache_hit"] = detection.get("cache_hit", False)
+                if detection.get("error"):
+                    result["notes"] = detection.get("error")
+                detected_stack = detection.get("detected_stack", [])
+                has_whatsapp_link = detection.get("has_whatsapp_link", False)
+                if html:
+                    has_form, html_whatsapp = _scan_html_signals(html)
+                    result["has_form"] = has_form
+                    has_whatsapp_link = has_whatsapp_link or html_whatsapp
+                result["tech_stack"] = {
+                    "detected_stack": detected_stack,
+                    "has_whatsapp_link": has_whatsapp_link,
+                }
 
-            if not detection.get("cache_hit"):
-                for path in CONTACT_PATHS:
-                    contact_url = urljoin(site, path)
-                    html_contact = await self._fetch_html(session, contact_url)
+                if not detection.get("cache_hit"):
+                    tech_stack = result["tech_stack"]
+                    # With every signal already known, the contact page only has to exist.
+                    read_body = not (
+                        result["has_form"] and tech_stack.get("has_whatsapp_link") and tech_stack.get("detected_stack")
+                    )
+                    html_contact = await self._probe_contact_page(session, site, read_body=read_body)
                     if html_contact:
                         result["has_contact_page"] = True
-                        if not result["has_form"]:
-                            result["has_form"] = _has_form(html_contact)
-                        if not result["tech_stack"].get("has_whatsapp_link"):
-                            result["tech_stack"]["has_whatsapp_link"] = _has_whatsapp_link(html_contact)
-                        if not result["tech_stack"].get("detected_stack"):
-                            detection_extra = self.detector.analyze_content(html_contact, {}, [])
-                            result["tech_stack"]["detected_stack"] = detection_extra.get("detected_stack", [])
+                        if not result["has_form"] or not tech_stack.get("has_whatsapp_link"):
+                            contact_form, contact_whatsapp = _scan_html_signals(html_contact)
+                            result["has_form"] = result["has_form"] or contact_form
+                            tech_stack["has_whatsapp_link"] = tech_stack.get("has_whatsapp_link") or contact_whatsapp
+                        if not tech_stack.get("detected_stack"):
+                            detection_extra = self._analyze_content_cached(html_contact)
+                            tech_stack["detected_stack"] = list(detection_extra.get("detected_stack", []))
                             result["tech_score"] = max(result["tech_score"], detection_extra.get("tech_score", 0))
                             result["tech_confidence"] = max(result["tech_confidence"], detection_extra.get("confidence", 0))
-                        break
 
-        try:
-            score_gate = max(
-                int(float(lead.get("score_v2") or 0)),
-                int(float(lead.get("score_v1") or 0)),
-            )
-        except Exception:
-            score_gate = 0
-        socio_names = _extract_socios_names_from_lead(lead)
-        if score_gate > 60 and socio_names:
-            linkedin_people = await self._search_linkedin_people(session, lead, socio_names)
-            if linkedin_people:
-                combined = list(dict.fromkeys(result.get("linkedin_people", []) + linkedin_people))
-                result["linkedin_people"] = combined[:5]
+            try:
+                score_gate = max(
+                    int(float(lead.get("score_v2") or 0)),
+                    int(float(lead.get("score_v1") or 0)),
+                )
+            except Exception:
+                score_gate = 0
+            socio_names = _extract_socios_names_from_lead(lead)
+            if score_gate > 60 and socio_names:
+                linkedin_people = await self._search_linkedin_people(session, lead, socio_names)
+                if linkedin_people:
+                    result["linkedin_people"] = _merge_unique(result.get("linkedin_people", []), linkedin_people)
 
-        try:
-            person_payload = await self.person_intel.enrich(session, lead, result)
-            if person_payload:
-                result.update(person_payload)
-        except Exception as exc:
-            result["notes"] = (result.get("notes") or "").strip()
-            if result["notes"]:
-                result["notes"] = f"{result['notes']} | person_intel_failed"
-            else:
-                result["notes"] = f"person_intel_failed: {exc}"
+            try:
+                person_payload = await self.person_intel.enrich(session, lead, result, avatar_task=avatar_task)
+                if person_payload:
+                    result.update(person_payload)
+            except Exception as exc:
+                result["notes"] = (result.get("notes") or "").strip()
+                if result["notes"]:
+                    result["notes"] = f"{result['notes']} | person_intel_failed"
+                else:
+                    result["notes"] = f"person_intel_failed: {exc}"
+        except BaseException:
+            # Any failure before person_intel awaits it would orphan the task on the shared loop.
+            if avatar_task is not None:
+                avatar_task.cancel()
+            raise
 
         return result
 
@@ -692,60 +1164,79 @@ class AsyncEnricher:
         run_id: str,
         cancel_event: Optional[asyncio.Event] = None,
     ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-        semaphore = asyncio.Semaphore(self.concurrency)
         results: List[Dict[str, Any]] = []
         durations_ms: List[int] = []
         error_count = 0
         cache_hits = 0
-        progress_lock = asyncio.Lock()
-        last_progress_emit = time.monotonic()
+        progress_due = asyncio.Event()
+        emitted_count = 0
         provider_error: Dict[str, Any] = {}
         provider_error_count = 0
         provider_error_logged = False
-        provider_error_lock = asyncio.Lock()
         stop_event = asyncio.Event()
         provider_limit_hit = False
         provider_http_status: Optional[int] = None
         provider_message: Optional[str] = None
         provider_backoff_seconds: Optional[float] = None
-        start_ts = datetime.utcnow()
-        cutoff = start_ts - timedelta(hours=self.cache_ttl_hours)
-
-        def _parse_dt(value: Optional[str]) -> Optional[datetime]:
-            if not value:
-                return None
-            try:
-                return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                return None
+        # enriched_at is stored as "%Y-%m-%d %H:%M:%S" (UTC), which sorts lexicographically.
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=self.cache_ttl_hours)).strftime("%Y-%m-%d %H:%M:%S")
 
         cnpjs = [lead.get("cnpj") for lead in leads if lead.get("cnpj")]
-        cached_by_cnpj = storage.fetch_enrichments_by_cnpjs(cnpjs)
-        fresh_cache: Dict[str, Dict[str, Any]] = {}
-        for cnpj, cached in cached_by_cnpj.items():
-            enriched_at = _parse_dt(cached.get("enriched_at"))
-            if enriched_at and enriched_at >= cutoff:
-                fresh_cache[cnpj] = cached
+        fresh_cache = await asyncio.to_thread(storage.fetch_enrichment_results_by_cnpjs, cnpjs, cutoff)
+        for cached in fresh_cache.values():
+            cached.pop("enriched_at", None)
+
+        log_queue: "asyncio.Queue[Optional[Tuple[str, str, str, Dict[str, Any]]]]" = asyncio.Queue()
+
+        def _log(level: str, event: str, detail: Dict[str, Any]) -> None:
+            log_queue.put_nowait((storage._utcnow(), level, event, detail))
+
+        async def _log_writer() -> None:
+            # Single writer so SQLite inserts run off the event loop and in batches.
+            while True:
+                batch = [await log_queue.get()]
+                while not log_queue.empty() and len(batch) < LOG_FLUSH_MAX:
+                    batch.append(log_queue.get_nowait())
+                events = [item for item in batch if item is not None]
+                if events:
+                    try:
+                        await asyncio.to_thread(storage.log_events, events)
+                    except Exception:
+                        logger.exception("Failed to write enrichment logs")
+                if batch[-1] is None:
+                    return
 
         async def _emit_progress() -> None:
-            nonlocal last_progress_emit
+            nonlocal emitted_count
             processed_count = len(results)
-            if processed_count == 0:
+            if processed_count == emitted_count:
                 return
-            now = time.monotonic()
-            if processed_count % 10 == 0 or (now - last_progress_emit) >= 5:
-                last_progress_emit = now
-                storage.update_run(run_id, enriched_count=processed_count, errors_count=error_count)
-                storage.log_event(
-                    "info",
-                    "enrichment_progress",
-                    {
-                        "run_id": run_id,
-                        "processed_count": processed_count,
-                        "errors_count": error_count,
-                        "cache_hits": cache_hits,
-                    },
-                )
+            emitted_count = processed_count
+            await asyncio.to_thread(storage.update_run, run_id, enriched_count=processed_count, errors_count=error_count)
+            _log(
+                "info",
+                "enrichment_progress",
+                {
+                    "run_id": run_id,
+                    "processed_count": processed_count,
+                    "errors_count": error_count,
+                    "cache_hits": cache_hits,
+                },
+            )
+
+        async def _progress_emitter() -> None:
+            while True:
+                try:
+                    await asyncio.wait_for(progress_due.wait(), timeout=PROGRESS_EMIT_INTERVAL_SEC)
+                except asyncio.TimeoutError:
+                    pass
+                progress_due.clear()
+                await _emit_progress()
+
+        def _add_result(result: Dict[str, Any]) -> None:
+            results.append(result)
+            if len(results) % PROGRESS_EMIT_EVERY == 0:
+                progress_due.set()
 
         async def runner(lead: Dict[str, Any]):
             nonlocal cache_hits, error_count, provider_error_count, provider_error_logged
@@ -754,149 +1245,152 @@ class AsyncEnricher:
                 return
             if stop_event.is_set():
                 return
-            cached = fresh_cache.get(lead.get("cnpj"))
-            if cached:
-                cache_hits += 1
-                cached_stack = cached.get("tech_stack_json")
-                cached_signals = cached.get("signals_json")
-                result = {
-                    "cnpj": cached.get("cnpj"),
-                    "run_id": run_id,
-                    "site": cached.get("site"),
-                    "instagram": cached.get("instagram"),
-                    "linkedin_company": cached.get("linkedin_company"),
-                    "linkedin_people": json.loads(cached.get("linkedin_people_json") or "[]"),
-                    "google_maps_url": cached.get("google_maps_url"),
-                    "has_contact_page": bool(cached.get("has_contact_page")),
-                    "has_form": bool(cached.get("has_form")),
-                    "tech_stack": json.loads(cached_stack) if cached_stack else {},
-                    "tech_score": int(cached.get("tech_score") or 0),
-                    "tech_confidence": int(cached.get("tech_confidence") or 0),
-                    "has_marketing": bool(cached.get("has_marketing")),
-                    "has_analytics": bool(cached.get("has_analytics")),
-                    "has_ecommerce": bool(cached.get("has_ecommerce")),
-                    "has_chat": bool(cached.get("has_chat")),
-                    "signals": json.loads(cached_signals) if cached_signals else {},
-                    "fetched_url": cached.get("fetched_url"),
-                    "fetch_status": cached.get("fetch_status"),
-                    "fetch_ms": cached.get("fetch_ms") or 0,
-                    "rendered_used": bool(cached.get("rendered_used")),
-                    "contact_quality": cached.get("contact_quality"),
-                    "notes": cached.get("notes"),
-                    "wealth_score": cached.get("wealth_score") or 0,
-                    "avatar_url": cached.get("avatar_url"),
-                    "person_json": json.loads(cached.get("person_json") or "{}")
-                    if cached.get("person_json")
-                    else {},
-                    "cache_hit": True,
-                }
-                results.append(result)
-                async with progress_lock:
-                    await _emit_progress()
-                return
-            async with semaphore:
-                if stop_event.is_set():
-                    return
-                try:
-                    lead_start = time.time()
-                    enriched = await self._enrich_one(session, lead, run_id)
-                    durations_ms.append(int((time.time() - lead_start) * 1000))
-                    if enriched.get("cache_hit"):
-                        cache_hits += 1
-                    results.append(enriched)
-                    async with progress_lock:
-                        await _emit_progress()
-                except ProviderResponseError as exc:
-                    message = _sanitize_error_message(str(exc))
-                    provider_name = getattr(self.provider, "name", "unknown")
-                    hint = _provider_hint(provider_name, message)
-                    if exc.status_code:
-                        provider_http_status = exc.status_code
-                    if exc.payload:
-                        provider_message = exc.payload.get("message") or exc.payload.get("error")
-                    if exc.status_code == 429:
-                        provider_limit_hit = True
-                        provider_backoff_seconds = self._backoff_seconds(1)
-                        storage.log_event(
+            try:
+                lead_start = time.time()
+                enriched = await self._enrich_one(session, lead, run_id)
+                durations_ms.append(int((time.time() - lead_start) * 1000))
+                if enriched.get("cache_hit"):
+                    cache_hits += 1
+                _add_result(enriched)
+            except ProviderResponseError as exc:
+                message = _sanitize_error_message(str(exc))
+                provider_name = getattr(self.provider, "name", "unknown")
+                hint = _provider_hint(provider_name, message)
+                if exc.status_code:
+                    provider_http_status = exc.status_code
+                if exc.payload:
+                    provider_message = exc.payload.get("message") or exc.payload.get("error")
+                if exc.status_code == 429:
+                    provider_limit_hit = True
+                    provider_backoff_seconds = self._backoff_seconds(1)
+                    _log(
+                        "warning",
+                        "provider_limit_hit",
+                        {
+                            "run_id": run_id,
+                            "provider": provider_name,
+                            "http_status": exc.status_code,
+                            "message": provider_message or message,
+                            "backoff_seconds": provider_backoff_seconds,
+                        },
+                    )
+                provider_error_count += 1
+                if not provider_error:
+                    provider_error.update(
+                        {
+                            "provider": provider_name,
+                            "message": message,
+                            "hint": hint,
+                        }
+                    )
+                stop_event.set()
+                # Claimed before the first await, so only one worker records the error.
+                if not provider_error_logged:
+                    provider_error_logged = True
+                    _log(
+                        "error",
+                        "enrichment_provider_error",
+                        {
+                            "run_id": run_id,
+                            "provider": provider_error.get("provider"),
+                            "error": message,
+                            "hint": hint,
+                        },
+                    )
+                    if hint:
+                        _log(
                             "warning",
-                            "provider_limit_hit",
-                            {
-                                "run_id": run_id,
-                                "provider": provider_name,
-                                "http_status": exc.status_code,
-                                "message": provider_message or message,
-                                "backoff_seconds": provider_backoff_seconds,
-                            },
+                            "enrichment_provider_hint",
+                            {"run_id": run_id, "provider": provider_name, "hint": hint},
                         )
-                    async with provider_error_lock:
-                        provider_error_count += 1
-                        if not provider_error:
-                            provider_error.update(
-                                {
-                                    "provider": provider_name,
-                                    "message": message,
-                                    "hint": hint,
-                                }
-                            )
-                        if not provider_error_logged:
-                            storage.log_event(
-                                "error",
-                                "enrichment_provider_error",
-                                {
-                                    "run_id": run_id,
-                                    "provider": provider_error.get("provider"),
-                                    "error": message,
-                                    "hint": hint,
-                                },
-                            )
-                            if hint:
-                                storage.log_event(
-                                    "warning",
-                                    "enrichment_provider_hint",
-                                    {"run_id": run_id, "provider": provider_name, "hint": hint},
-                                )
-                            storage.record_error(run_id, "enriching", f"{message} {hint or ''}".strip())
-                            provider_error_logged = True
-                    stop_event.set()
-                except Exception as exc:
-                    error_count += 1
-                    storage.log_event(
-                        "error",
-                        "enrichment_error",
-                        {"cnpj": lead.get("cnpj"), "error": _sanitize_error_message(str(exc))},
+                    await asyncio.to_thread(
+                        storage.record_error, run_id, "enriching", f"{message} {hint or ''}".strip()
                     )
+            except Exception as exc:
+                error_count += 1
+                _log(
+                    "error",
+                    "enrichment_error",
+                    {"cnpj": lead.get("cnpj"), "error": _sanitize_error_message(str(exc))},
+                )
 
-        timeout = aiohttp.ClientTimeout(total=self.timeout + 2)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            tasks = [runner(lead) for lead in leads]
-            await asyncio.gather(*tasks)
-
-        avg_fetch_ms = int(sum(durations_ms) / len(durations_ms)) if durations_ms else 0
-        processed_count = len(results)
-        stats = {
-            "provider_error": provider_error or None,
-            "provider_error_count": provider_error_count,
-            "skipped_due_to_provider_error": bool(stop_event.is_set()),
-            "provider_limit_hit": provider_limit_hit,
-            "provider_http_status": provider_http_status,
-            "provider_message": provider_message,
-            "provider_backoff_seconds": provider_backoff_seconds,
-            "processed_count": processed_count,
-            "errors_count": error_count,
-            "cache_hits": cache_hits,
-            "avg_fetch_ms": avg_fetch_ms,
-        }
-        storage.log_event(
-            "info",
-            "enrichment_stats",
-            {
-                "run_id": run_id,
+        pending: List[Dict[str, Any]] = []
+        for lead in leads:
+            cached = fresh_cache.get(lead.get("cnpj"))
+            if not cached:
+                pending.append(lead)
+                continue
+            cache_hits += 1
+            result = dict(cached)
+            result["run_id"] = run_id
+            result["cache_hit"] = True
+            results.append(result)
+
+        self._search_cache = await asyncio.to_thread(storage.cache_mget, self._batch_search_keys(pending))
+        self._search_writes = {}
+        self._search_inflight = {}
+        self._contact_url_by_host = {}
+        session = await self._get_session()
+        prewarm_domains = {_email_domain(_pick_email(lead)) for lead in pending} - GENERIC_EMAIL_DOMAINS
+        prewarm_domains.discard("")
+
+        def _cancelled() -> bool:
+            return bool(cancel_event and cancel_event.is_set())
+
+        async def _prewarm(domain: str) -> None:
+            await _dns_valid(domain)
+
+        # Resolve candidate domains concurrently up front so discovery answers its DNS check from _DNS_CACHE.
+        if prewarm_domains and not _cancelled():
+            try:
+                async with asyncio.timeout(DNS_PREWARM_TIMEOUT_SEC):
+                    await _run_bounded(list(prewarm_domains), _prewarm, self.concurrency, should_stop=_cancelled)
+            except TimeoutError:
+                _log("warning", "dns_prewarm_timeout", {"run_id": run_id, "domains": len(prewarm_domains)})
+        log_writer = asyncio.create_task(_log_writer())
+        try:
+            await _emit_progress()
+            emitter = asyncio.create_task(_progress_emitter())
+            try:
+                await _run_bounded(
+                    pending,
+                    runner,
+                    self.concurrency,
+                    should_stop=lambda: stop_event.is_set() or bool(cancel_event and cancel_event.is_set()),
+                )
+            finally:
+                emitter.cancel()
+                await self._flush_search_cache()
+
+            avg_fetch_ms = int(sum(durations_ms) / len(durations_ms)) if durations_ms else 0
+            processed_count = len(results)
+            stats = {
+                "provider_error": provider_error or None,
+                "provider_error_count": provider_error_count,
+                "skipped_due_to_provider_error": bool(stop_event.is_set()),
+                "provider_limit_hit": provider_limit_hit,
+                "provider_http_status": provider_http_status,
+                "provider_message": provider_message,
+                "provider_backoff_seconds": provider_backoff_seconds,
                 "processed_count": processed_count,
                 "errors_count": error_count,
                 "cache_hits": cache_hits,
                 "avg_fetch_ms": avg_fetch_ms,
-            },
-        )
+            }
+            _log(
+                "info",
+                "enrichment_stats",
+                {
+                    "run_id": run_id,
+                    "processed_count": processed_count,
+                    "errors_count": error_count,
+                    "cache_hits": cache_hits,
+                    "avg_fetch_ms": avg_fetch_ms,
+                },
+            )
+        finally:
+            log_queue.put_nowait(None)
+            await log_writer
         return results, stats
 
 
@@ -908,11 +1402,17 @@ _FALLBACK_UAS = [
 ]
 
 
-def get_stealth_headers() -> Dict[str, str]:
+_HEADER_POOL_SIZE = 32
+
+
+def _random_user_agent() -> str:
     try:
-        ua = _UA.random
+        return _UA.random
     except Exception:
-        ua = random.choice(_FALLBACK_UAS)
+        return random.choice(_FALLBACK_UAS)
+
+
+def _build_stealth_headers(ua: str) -> Dict[str, str]:
     return {
         "User-Agent": ua,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -922,6 +1422,15 @@ def get_stealth_headers() -> Dict[str, str]:
     }
 
 
+# Pre-generated once so the fake-useragent lottery stays off the request path.
+_HEADER_POOL = [MappingProxyType(_build_stealth_headers(_random_user_agent())) for _ in range(_HEADER_POOL_SIZE)]
+_HEADER_ROTATION = itertools.cycle(_HEADER_POOL)
+
+
+def get_stealth_headers() -> Mapping[str, str]:
+    return next(_HEADER_ROTATION)
+
+
 GENERIC_EMAIL_DOMAINS = {
     "gmail.com",
     "hotmail.com",
@@ -938,52 +1447,73 @@ class AdaptiveLimiter:
     def __init__(self, concurrency: int):
         self._limit = max(1, int(concurrency))
         self._semaphore = asyncio.Semaphore(self._limit)
-        self._lock = asyncio.Lock()
+        self._retired = 0
         self._pause_until = 0.0
 
     async def acquire(self) -> None:
-        while True:
-            now = time.monotonic()
-            if now < self._pause_until:
-                await asyncio.sleep(self._pause_until - now)
-                continue
-            await self._semaphore.acquire()
-            return
+        while (delay := self._pause_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        await self._semaphore.acquire()
 
     def release(self) -> None:
+        # A reduced limit is paid back out of returned permits instead of a parked acquire task.
+        if self._retired:
+            self._retired -= 1
+            return
         self._semaphore.release()
 
     async def reduce(self) -> None:
-        async with self._lock:
-            self._pause_until = max(self._pause_until, time.monotonic() + 60)
-            if self._limit > 1:
-                self._limit -= 1
-                asyncio.create_task(self._semaphore.acquire())
+        self._pause_until = max(self._pause_until, time.monotonic() + 60)
+        if self._limit > 1:
+            self._limit -= 1
+            self._retired += 1
 
 
 def _email_domain(email: Optional[str]) -> str:
-    if not email or "@" not in email:
+    if not email:
         return ""
-    return email.split("@")[-1].strip().lower()
+    _, at, domain = email.rpartition("@")
+    return domain.strip().lower() if at else ""
+
 
+def _pick_email(lead: Dict[str, Any]) -> Optional[str]:
+    emails = lead.get("emails_norm") or []
+    if isinstance(emails, str):
+        emails = _json_loads(emails, [emails])
+    return emails[0] if emails else lead.get("email")
 
-def _is_generic_email(email: Optional[str]) -> bool:
-    return _email_domain(email) in GENERIC_EMAIL_DOMAINS
+
+_DNS_CACHE: Dict[str, Tuple[bool, float]] = {}
+_DNS_NOT_FOUND_ERRNOS = frozenset(
+    code for code in (getattr(socket, "EAI_NONAME", None), getattr(socket, "EAI_NODATA", None)) if code is not None
+)
 
 
 async def _dns_valid(domain: str) -> bool:
     if not domain:
         return False
+    now = time.monotonic()
+    hit = _DNS_CACHE.get(domain)
+    if hit and hit[1] > now:
+        return hit[0]
+    ttl = DNS_CACHE_TTL_SEC
     try:
         await asyncio.get_running_loop().getaddrinfo(domain, None)
-        return True
-    except socket.gaierror:
-        return False
+        valid = True
+    except OSError as exc:
+        valid = False
+        # Only "no such name" is an answer; EAI_AGAIN, timeouts and the like are asked again soon.
+        if not (isinstance(exc, socket.gaierror) and exc.errno in _DNS_NOT_FOUND_ERRNOS):
+            ttl = DNS_RETRY_TTL_SEC
     except Exception:
         return False
+    if len(_DNS_CACHE) >= DNS_CACHE_MAX_ENTRIES:
+        _DNS_CACHE.clear()
+    _DNS_CACHE[domain] = (valid, time.monotonic() + ttl)
+    return valid
 
 
-_COMPANY_STOPWORDS = {
+_COMPANY_STOPWORDS = frozenset({
     "ltda",
     "me",
     "mei",
@@ -997,12 +1527,14 @@ _COMPANY_STOPWORDS = {
     "das",
     "e",
     "empresa",
-}
+})
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]+")
 
 
-def _normalize_company_text(text: str) -> List[str]:
-    text = re.sub(r"[^a-z0-9 ]+", " ", (text or "").lower())
-    return [tok for tok in text.split() if tok and tok not in _COMPANY_STOPWORDS]
+@lru_cache(maxsize=4096)
+def _normalize_company_text(text: str) -> Tuple[str, ...]:
+    text = _NON_ALNUM_RE.sub(" ", (text or "").lower())
+    return tuple(tok for tok in text.split() if tok not in _COMPANY_STOPWORDS)
 
 
 def _title_similarity(title: str, company: str) -> float:
@@ -1012,9 +1544,15 @@ def _title_similarity(title: str, company: str) -> float:
     company_tokens = _normalize_company_text(company)
     if not title_tokens or not company_tokens:
         return 0.0
-    token_overlap = len(set(title_tokens) & set(company_tokens)) / max(1, len(set(company_tokens)))
-    seq_ratio = SequenceMatcher(None, " ".join(title_tokens), " ".join(company_tokens)).ratio()
-    return max(token_overlap, seq_ratio)
+    company_set = set(company_tokens)
+    token_overlap = len(set(title_tokens) & company_set) / len(company_set)
+    if token_overlap >= 1.0:
+        return token_overlap
+    matcher = SequenceMatcher(None, " ".join(title_tokens), " ".join(company_tokens))
+    # Both quick ratios are cheap upper bounds on ratio(); skip the quadratic diff when it cannot win.
+    if matcher.real_quick_ratio() <= token_overlap or matcher.quick_ratio() <= token_overlap:
+        return token_overlap
+    return max(token_overlap, matcher.ratio())
 
 
 async def _fetch_candidate_html(
@@ -1025,7 +1563,7 @@ async def _fetch_candidate_html(
     start = time.time()
     try:
         async with session.get(url, headers=get_stealth_headers(), timeout=timeout_sec, allow_redirects=True) as resp:
-            html = await resp.text(errors="ignore")
+            html = await read_capped_text(resp)
             fetch_ms = int((time.time() - start) * 1000)
             headers = {k.lower(): v for k, v in resp.headers.items()}
             return {
@@ -1046,6 +1584,62 @@ async def _fetch_candidate_html(
         }
 
 
+def _fetch_giveup(exc: Exception) -> bool:
+    # Timeouts already spent the whole budget and DNS failures will not heal on a retry.
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    return isinstance(exc, aiohttp.ClientConnectorError) and isinstance(exc.os_error, socket.gaierror)
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    headers = getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _fetch_wait(factor: float, max_value: float) -> Generator[float, Any, None]:
+    # backoff sends the raised exception in, so a server-provided Retry-After wins over the
+    # jittered exponential delay (jitter is applied here, not by the decorator).
+    exc = yield  # type: ignore[misc]
+    attempt = 0
+    while True:
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = min(retry_after, max_value)
+        else:
+            delay = backoff.full_jitter(min(factor * 2**attempt, max_value))
+        attempt += 1
+        exc = yield delay
+
+
+@backoff.on_exception(
+    _fetch_wait,
+    aiohttp.ClientError,
+    max_tries=FETCH_MAX_TRIES,
+    factor=FETCH_BACKOFF_FACTOR,
+    max_value=FETCH_BACKOFF_MAX,
+    jitter=None,
+    giveup=_fetch_giveup,
+    logger=None,
+)
+async def _fetch_page(session: aiohttp.ClientSession, url: str, **kwargs: Any) -> Dict[str, Any]:
+    async with session.get(url, **kwargs) as resp:
+        if resp.status in RETRYABLE_FETCH_STATUSES:
+            resp.raise_for_status()
+        return {
+            "status": resp.status,
+            "html": await read_capped_text(resp) if resp.status < 400 else "",
+            "headers": {k.lower(): v for k, v in resp.headers.items()},
+            "cookies": [cookie.key for cookie in resp.cookies.values()],
+            "url": str(resp.url),
+        }
+
+
 def _extract_external_link(html: str) -> Optional[str]:
     if not html:
         return None
@@ -1072,31 +1666,28 @@ async def _direct_fetch(
     for url in candidates:
         start = time.time()
         try:
-            async with session.get(url, headers=get_stealth_headers()) as resp:
-                if resp.status != 200:
-                    continue
-                html = await resp.text(errors="ignore")
-                soup = BeautifulSoup(html, "html.parser")
-                title = (soup.title.string or "").strip() if soup.title else ""
-                meta_tag = soup.find("meta", attrs={"name": "description"}) or soup.find(
-                    "meta", attrs={"property": "og:description"}
-                )
-                meta_desc = meta_tag.get("content", "").strip() if meta_tag else ""
-                headers = {k.lower(): v for k, v in resp.headers.items()}
-                cookies = [cookie.key for cookie in resp.cookies.values()]
-                analysis = detector.analyze_content(html, headers, cookies)
-                return {
-                    "title": title,
-                    "meta_description": meta_desc,
-                    "analysis": analysis,
-                    "fetch_status": resp.status,
-                    "fetch_ms": int((time.time() - start) * 1000),
-                    "fetched_url": str(resp.url),
-                    "has_form": _has_form(html),
-                    "has_whatsapp_link": analysis.get("has_whatsapp_link") or _has_whatsapp_link(html),
-                }
+            page = await _fetch_page(session, url, headers=get_stealth_headers())
         except (aiohttp.ClientError, asyncio.TimeoutError):
             continue
+        if page["status"] != 200:
+            continue
+        html = page["html"]
+        head = _head_html(html)
+        title = _extract_title(head)
+        metas = _extract_meta(head)
+        meta_desc = metas.get(("name", "description")) or metas.get(("property", "og:description"), "")
+        analysis = detector.analyze_content(html, page["headers"], page["cookies"])
+        has_form, has_whatsapp = _scan_html_signals(html)
+        return {
+            "title": title,
+            "meta_description": meta_desc,
+            "analysis": analysis,
+            "fetch_status": page["status"],
+            "fetch_ms": int((time.time() - start) * 1000),
+            "fetched_url": page["url"],
+            "has_form": has_form,
+            "has_whatsapp_link": analysis.get("has_whatsapp_link") or has_whatsapp,
+        }
     return None
 
 
@@ -1105,63 +1696,44 @@ async def enrich_leads_hybrid(
     provider: Optional[SearchProvider] = None,
     concurrency: int = 8,
     timeout: int = 5,
+    settings: Optional[EnrichmentSettings] = None,
 ) -> List[Dict[str, Any]]:
     if provider is None:
         provider = providers.select_provider("serper")
+    settings = settings or EnrichmentSettings.from_env()
     limiter = AdaptiveLimiter(concurrency)
     detector = TechSniperDetector(timeout=timeout)
     timeout_cfg = aiohttp.ClientTimeout(sock_connect=3, sock_read=5, total=max(8, timeout))
-    person_intel = person_intelligence.PersonIntelligence(
-        evolution_base_url=os.getenv("EVOLUTION_API_URL"),
-        evolution_api_key=os.getenv("EVOLUTION_API_KEY"),
-        avatar_cache_dir=os.getenv("AVATAR_CACHE_DIR", "uploads/avatars"),
-        enable_email_finder=os.getenv("ENABLE_EMAIL_FINDER", "0") == "1",
-        enable_holehe=os.getenv("ENABLE_HOLEHE", "0") == "1",
-    )
+    person_intel = settings.build_person_intel()
+    # Leads from the same group often share a corporate domain; fetch each homepage once per batch.
+    direct_fetches: Dict[str, "asyncio.Future[Any]"] = {}
+    # Likewise branches repeat the same company and socio queries; each is a paid call, so search it once.
+    searches: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def _search(session: aiohttp.ClientSession, query: str) -> Dict[str, Any]:
+        async def _fetch() -> Dict[str, Any]:
+            await limiter.acquire()
+            try:
+                return await provider.search(session, query)
+            except ProviderResponseError as exc:
+                if exc.status_code == 429:
+                    await limiter.reduce()
+                raise
+            finally:
+                limiter.release()
 
-    async def _enrich_one(session: aiohttp.ClientSession, lead: Dict[str, Any]) -> Dict[str, Any]:
-        result = {
-            "cnpj": lead.get("cnpj"),
-            "run_id": lead.get("run_id"),
-            "site": None,
-            "instagram": None,
-            "linkedin_company": None,
-            "linkedin_people": [],
-            "google_maps_url": lead.get("flags", {}).get("google_maps_url"),
-            "has_contact_page": False,
-            "has_form": False,
-            "tech_stack": {},
-            "tech_score": 0,
-            "tech_confidence": 0,
-            "has_marketing": False,
-            "has_analytics": False,
-            "has_ecommerce": False,
-            "has_chat": False,
-            "signals": {},
-            "golden_techs_found": [],
-            "tech_sources": {},
-            "fetched_url": None,
-            "fetch_status": None,
-            "fetch_ms": 0,
-            "rendered_used": False,
-            "contact_quality": lead.get("contact_quality"),
-            "website_confidence": 0,
-            "discovery_method": "",
-            "search_term_used": "",
-            "candidates_considered": 0,
-            "website_match_reasons": [],
-            "excluded_candidates_count": 0,
-            "notes": "",
-            "wealth_score": 0,
-            "avatar_url": None,
-            "person_json": {},
-        }
+        return await _coalesced(searches, query, _fetch)
+
+    async def _enrich_one(
+        session: aiohttp.ClientSession,
+        lead: Dict[str, Any],
+        domain: str,
+        dns_ok: bool,
+    ) -> Dict[str, Any]:
+        result = _new_result(lead, lead.get("run_id"))
+        avatar_task = _start_avatar_fetch(person_intel, session, lead)
         try:
-            emails = lead.get("emails_norm") or []
-            email = emails[0] if emails else lead.get("email")
-            domain = _email_domain(email)
-            generic = _is_generic_email(email)
-            dns_ok = await _dns_valid(domain) if domain else False
+            generic = domain in GENERIC_EMAIL_DOMAINS
 
             title = ""
             meta_desc = ""
@@ -1169,7 +1741,11 @@ async def enrich_leads_hybrid(
             low_confidence_site = False
 
             if domain and dns_ok and not generic:
-                direct = await _direct_fetch(session, domain, detector)
+                direct = await _coalesced(
+                    direct_fetches,
+                    domain,
+                    lambda: _direct_fetch(session, domain, detector),
+                )
                 if direct:
                     title = direct.get("title") or ""
                     meta_desc = direct.get("meta_description") or ""
@@ -1187,28 +1763,20 @@ async def enrich_leads_hybrid(
                     if low_confidence_site:
                         result["notes"] = "low_confidence_site"
 
-            needs_fallback = generic or low_confidence_site or not result.get("site")
-            if needs_fallback:
+            # A generic email never reaches the direct fetch, so it always lands here without a site.
+            if low_confidence_site or not result.get("site"):
                 query = f"{lead.get('razao_social', '')} {lead.get('municipio', '')} {lead.get('uf', '')}".strip()
                 try:
-                    await limiter.acquire()
-                    search_data = await provider.search(session, query)
-                except ProviderResponseError as exc:
-                    if exc.status_code == 429:
-                        await limiter.reduce()
-                    result["notes"] = _sanitize_error_message(str(exc))
-                    search_data = {}
+                    search_data = await _search(session, query)
                 except Exception as exc:
                     result["notes"] = _sanitize_error_message(str(exc))
                     search_data = {}
-                finally:
-                    limiter.release()
 
                 if search_data:
                     result["site"] = search_data.get("site")
                     result["instagram"] = search_data.get("instagram")
                     result["linkedin_company"] = search_data.get("linkedin_company")
-                    result["linkedin_people"] = search_data.get("linkedin_people", [])
+                    result["linkedin_people"] = list(search_data.get("linkedin_people") or [])
 
             if direct_analysis:
                 result["tech_score"] = direct_analysis.get("tech_score", 0)
@@ -1244,14 +1812,16 @@ async def enrich_leads_hybrid(
                 }
 
             if title or meta_desc or low_confidence_site:
-                result["signals"] = result.get("signals") or {}
-                result["signals"].update(
-                    {
-                        "site_title": title,
-                        "site_meta_description": meta_desc,
-                        "low_confidence_site": low_confidence_site,
-                    }
-                )
+                site_signals = {
+                    "site_title": title,
+                    "site_meta_description": meta_desc,
+                    "low_confidence_site": low_confidence_site,
+                }
+                if result.get("signals"):
+                    # The detector signals may be shared with other leads of the same domain.
+                    result["signals"] = {**result["signals"], **site_signals}
+                else:
+                    result["signals"] = site_signals
 
             try:
                 score_gate = max(
@@ -1266,30 +1836,22 @@ async def enrich_leads_hybrid(
                 for socio_name in socio_names:
                     query = f'site:linkedin.com/in/ "{socio_name}" "{razao}"'.strip()
                     try:
-                        await limiter.acquire()
-                        people_data = await provider.search(session, query)
-                    except ProviderResponseError as exc:
-                        if exc.status_code == 429:
-                            await limiter.reduce()
-                        people_data = {}
+                        people_data = await _search(session, query)
                     except Exception:
                         people_data = {}
-                    finally:
-                        limiter.release()
 
-                    links = people_data.get("linkedin_people", []) if people_data else []
+                    links = list(people_data.get("linkedin_people", []) or []) if people_data else []
                     for item in (people_data.get("candidates", []) or []):
                         url = item.get("url") or item.get("link")
                         if url and "linkedin.com/in/" in url:
                             links.append(url)
                     cleaned_links = [url.split("?")[0] for url in links if url and "linkedin.com/in/" in url]
                     if cleaned_links:
-                        merged = list(dict.fromkeys(result.get("linkedin_people", []) + cleaned_links))
-                        result["linkedin_people"] = merged[:5]
+                        result["linkedin_people"] = _merge_unique(result.get("linkedin_people", []), cleaned_links)
                         break
 
             try:
-                person_payload = await person_intel.enrich(session, lead, result)
+                person_payload = await person_intel.enrich(session, lead, result, avatar_task=avatar_task)
                 if person_payload:
                     result.update(person_payload)
             except Exception as exc:
@@ -1299,10 +1861,30 @@ async def enrich_leads_hybrid(
                 else:
                     result["notes"] = f"person_intel_failed: {exc}"
         except Exception as exc:
+            if avatar_task is not None:
+                avatar_task.cancel()
             result["notes"] = _sanitize_error_message(str(exc))
 
         return result
 
-    async with aiohttp.ClientSession(timeout=timeout_cfg) as session:
-        tasks = [_enrich_one(session, lead) for lead in leads]
-        return await asyncio.gather(*tasks)
+    # Classify emails for the whole batch up front and resolve each distinct
+    # corporate domain once, instead of once per lead inside the fan-out.
+    lead_domains = [_email_domain(_pick_email(lead)) for lead in leads]
+    unique_domains = list({domain for domain in lead_domains if domain and domain not in GENERIC_EMAIL_DOMAINS})
+    dns_map: Dict[str, bool] = {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(leads)
+    connector = _build_connector(concurrency)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout_cfg) as session:
+
+        async def _resolve(domain: str) -> None:
+            dns_map[domain] = await _dns_valid(domain)
+
+        await _run_bounded(unique_domains, _resolve, concurrency)
+
+        async def _worker(index: int) -> None:
+            domain = lead_domains[index]
+            results[index] = await _enrich_one(session, leads[index], domain, dns_map.get(domain, False))
+
+        await _run_bounded(list(range(len(leads))), _worker, concurrency)
+    return [item for item in results if item is not None]
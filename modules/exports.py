@@ -1,25 +1,105 @@
 """Webhook export helpers for Hunter OS."""
 
+import gzip
+import itertools
 import json
 import logging
+import os
 import re
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pandas as pd
 from uuid import uuid4
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from modules import storage, scoring
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:  # pragma: no cover - fallback when optional deps are missing
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
 logger = logging.getLogger("hunter")
 
+WEBHOOK_POOL_SIZE = 8
+# Opt-in: plenty of webhook receivers ignore Content-Encoding on requests.
+WEBHOOK_GZIP = os.getenv("WEBHOOK_GZIP", "0") == "1"
+WEBHOOK_GZIP_MIN_BYTES = 4096
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "3"))
+
+_NON_DIGIT_RE = re.compile(r"\D")
+_EMAIL_SEPARATOR_RE = re.compile(r"[;,]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_EMAIL_LOCAL_SEPARATOR_RE = re.compile(r"[._-]+")
+
+# One keep-alive pool for every webhook batch instead of a new TCP/TLS handshake per POST.
+# Transient 429/5xx and connection errors are retried on the pooled connection; the body (and its
+# batch_id) is identical on every attempt, and the last response is returned rather than raised.
+# Retry-After is ignored: urllib3 sleeps for whatever the receiver asks, outside the request timeout.
+_RETRY = Retry(
+    total=WEBHOOK_MAX_RETRIES,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["POST"]),
+    raise_on_status=False,
+    respect_retry_after_header=False,
+)
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=WEBHOOK_POOL_SIZE, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=WEBHOOK_POOL_SIZE, max_retries=_RETRY))
+
+
+def _encode_payload(payload: Dict[str, Any]) -> bytes:
+    if _ORJSON_AVAILABLE:
+        try:
+            # Leads often come straight out of a DataFrame, so numpy scalars must stay numbers.
+            return orjson.dumps(
+                payload, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
 
 def _chunked(items: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
     for idx in range(0, len(items), size):
         yield items[idx: idx + size]
 
 
+def _post_batch(
+    url: str,
+    batch: List[Dict[str, Any]],
+    run_id: Optional[str],
+    sent_at: str,
+    timeout: int,
+) -> Tuple[str, Optional[int]]:
+    payload = {
+        "batch_id": uuid4().hex,
+        "sent_at": sent_at,
+        "count": len(batch),
+        "run_id": run_id,
+        "leads": batch,
+    }
+    body = _encode_payload(payload)
+    headers = {"Content-Type": "application/json"}
+    if WEBHOOK_GZIP and len(body) >= WEBHOOK_GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    try:
+        resp = _SESSION.post(url, data=body, headers=headers, timeout=timeout)
+    except Exception as exc:
+        logger.warning("Webhook batch failed: %s", exc)
+        return "error", None
+    ok = 200 <= resp.status_code < 300
+    return ("success" if ok else "error"), resp.status_code
+
+
 def send_batch_to_webhook(
     leads: List[Dict[str, Any]],
     url: str,
@@ -33,45 +113,25 @@ def send_batch_to_webhook(
 
     run_id = next((lead.get("run_id") for lead in leads if lead.get("run_id")), None)
     results = {"sent": 0, "failed": 0, "batches": 0}
+    batches = list(_chunked(leads, batch_size))
+    # Batches go out together, so they share one send timestamp.
+    sent_at = storage._utcnow()
 
-    for batch in _chunked(leads, batch_size):
-        payload = {
-            "batch_id": uuid4().hex,
-            "sent_at": storage._utcnow(),
-            "count": len(batch),
-            "run_id": run_id,
-            "leads": batch,
-        }
-        try:
-            body = json.dumps(payload, ensure_ascii=False, default=str)
-            resp = requests.post(
-                url,
-                data=body,
-                headers={"Content-Type": "application/json"},
-                timeout=timeout,
-            )
-            ok = 200 <= resp.status_code < 300
-            status = "success" if ok else "error"
-            response_code = resp.status_code
-        except Exception as exc:
-            logger.warning("Webhook batch failed: %s", exc)
-            status = "error"
-            response_code = None
-
-        for lead in batch:
-            storage.record_webhook_delivery(
-                run_id=run_id,
-                lead_cnpj=lead.get("cnpj"),
-                status=status,
-                response_code=response_code,
-            )
+    # Batches are independent, so POST them concurrently; map() keeps outcomes in batch order.
+    with ThreadPoolExecutor(max_workers=min(WEBHOOK_POOL_SIZE, len(batches))) as executor:
+        outcomes = list(executor.map(lambda batch: _post_batch(url, batch, run_id, sent_at, timeout), batches))
 
+    deliveries: List[Tuple[Optional[str], str, Optional[int]]] = []
+    for batch, (status, response_code) in zip(batches, outcomes):
+        deliveries.extend((lead.get("cnpj"), status, response_code) for lead in batch)
         results["batches"] += 1
         if status == "success":
             results["sent"] += len(batch)
         else:
             results["failed"] += len(batch)
 
+    # One transaction for every lead's delivery row instead of a connection per lead.
+    storage.record_webhook_deliveries(run_id, deliveries)
     return results
 
 
@@ -81,8 +141,10 @@ def _coerce_list(value: Any) -> List[Any]:
     if isinstance(value, list):
         return value
     if isinstance(value, str):
+        if not _looks_like_json(value):
+            return [value]
         try:
-            parsed = json.loads(value)
+            parsed = _loads(value)
         except Exception:
             return [value]
         if parsed is None:
@@ -93,8 +155,27 @@ def _coerce_list(value: Any) -> List[Any]:
     return [value]
 
 
+_JSON_LEADING_CHARS = frozenset('[{"-0123456789tfnNI')
+
+
+def _looks_like_json(value: str) -> bool:
+    # Plain text (names, phones with punctuation, URLs) can't parse, so skip the decode-and-raise round trip.
+    stripped = value.lstrip()
+    return bool(stripped) and stripped[0] in _JSON_LEADING_CHARS
+
+
+def _loads(value: Any) -> Any:
+    # orjson first for speed; stdlib json still decides inputs orjson rejects (NaN literals, huge ints).
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(value)
+
+
 def _digits_only(value: Any) -> str:
-    return re.sub(r"\D", "", str(value or ""))
+    return _NON_DIGIT_RE.sub("", str(value or ""))
 
 
 def _stack_summary(value: Any) -> str:
@@ -104,7 +185,7 @@ def _stack_summary(value: Any) -> str:
         stack = value.get("detected_stack") or value.get("stack") or []
     else:
         try:
-            parsed = json.loads(value)
+            parsed = _loads(value) if not isinstance(value, str) or _looks_like_json(value) else value
         except Exception:
             parsed = value
         if isinstance(parsed, dict):
@@ -145,8 +226,10 @@ def _format_list(value: Any) -> str:
     if isinstance(value, dict):
         return json.dumps(value, ensure_ascii=False)
     if isinstance(value, str):
+        if not _looks_like_json(value):
+            return value
         try:
-            parsed = json.loads(value)
+            parsed = _loads(value)
         except Exception:
             return value
         if isinstance(parsed, list):
@@ -155,14 +238,32 @@ def _format_list(value: Any) -> str:
     return str(value)
 
 
+def _map_distinct_strings(values: pd.Series, func: Callable[[Any], Any]) -> pd.Series:
+    # JSON-string columns repeat a handful of values across leads; decode and format each distinct one once.
+    formatted: Dict[str, Any] = {}
+
+    def _format(value: Any) -> Any:
+        if not isinstance(value, str):
+            return func(value)
+        result = formatted.get(value)
+        if result is None:
+            result = formatted[value] = func(value)
+        return result
+
+    return values.map(_format)
+
+
 def _parse_json(value: Any) -> Dict[str, Any]:
     if not value:
         return {}
     if isinstance(value, dict):
         return value
     if isinstance(value, str):
+        # Only an object literal can yield a dict.
+        if not value.lstrip().startswith("{"):
+            return {}
         try:
-            parsed = json.loads(value)
+            parsed = _loads(value)
         except Exception:
             return {}
         return parsed if isinstance(parsed, dict) else {}
@@ -175,22 +276,22 @@ def _extract_person_primary(value: Any) -> Dict[str, Any]:
     return primary if isinstance(primary, dict) else {}
 
 
-def _flatten_flags(value: Any) -> str:
-    flags = _parse_json(value)
-    if not flags:
-        return ""
-    enabled = [key for key, val in flags.items() if val]
-    return ", ".join(sorted(enabled))
+def _list_items(values: pd.Series) -> pd.Series:
+    # One row per list element (index repeats per lead); falsy elements become "".
+    # Flattened by hand because explode() would turn None elements into NaN.
+    lists = values.map(_coerce_list)
+    flat = list(itertools.chain.from_iterable(lists))
+    items = pd.Series(flat, index=values.index.repeat(lists.map(len)), dtype=object)
+    return items.where(items.astype(bool), "").map(str)
 
 
-def _flag_value(value: Any, key: str) -> str:
-    flags = _parse_json(value)
-    return "true" if flags.get(key) else ""
-
-
-def _format_emails(value: Any) -> str:
-    items = _coerce_list(value)
-    return ", ".join([str(item) for item in items if item])
+def _join_items(items: pd.Series, index: pd.Index) -> pd.Series:
+    # groupby().agg(", ".join) slices a sub-Series per lead; a plain dict pass is far cheaper.
+    grouped: Dict[Any, List[str]] = {}
+    for key, value in zip(items.index, items):
+        if value:
+            grouped.setdefault(key, []).append(value)
+    return pd.Series([", ".join(grouped.get(key, ())) for key in index], index=index)
 
 
 def _format_cpfs(value: Any) -> str:
@@ -206,87 +307,73 @@ def _format_cpfs(value: Any) -> str:
     return ", ".join(cpfs)
 
 
-def _extract_linkedin_profile(row: Dict[str, Any]) -> str:
-    primary = _extract_person_primary(row.get("person_json"))
+def _extract_linkedin_profile(person_json: Any, linkedin_people_json: Any) -> str:
+    primary = _extract_person_primary(person_json)
     if primary.get("linkedin_profile"):
         return str(primary.get("linkedin_profile"))
-    people = _coerce_list(row.get("linkedin_people_json"))
+    people = _coerce_list(linkedin_people_json)
     if people:
         return str(people[0])
     return ""
 
 
-def _extract_wealth_score(row: Dict[str, Any]) -> Any:
-    raw = row.get("wealth_score")
+def _extract_wealth_score(raw: Any, person_json: Any) -> Any:
     if raw not in (None, ""):
         return raw
-    primary = _extract_person_primary(row.get("person_json"))
+    primary = _extract_person_primary(person_json)
     return primary.get("wealth_estimate") if primary else ""
 
 
+_EXPORT_SOURCE_COLUMNS = (
+    "cnpj",
+    "razao_social",
+    "nome_fantasia",
+    "cnae_desc",
+    "porte",
+    "endereco_norm",
+    "municipio",
+    "uf",
+    "telefones_norm",
+    "emails_norm",
+    "socios_json",
+    "tech_stack_json",
+    "site",
+    "instagram",
+    "linkedin_company",
+    "linkedin_people_json",
+    "search_term_used",
+    "discovery_method",
+    "website_confidence",
+    "website_match_reasons",
+    "candidates_considered",
+    "excluded_candidates_count",
+    "golden_techs_found",
+    "tech_sources",
+    "score_version",
+    "score_reasons",
+    "flags_json",
+    "score_label",
+    "score_v2",
+    "google_maps_url",
+    "person_json",
+    "avatar_url",
+    "wealth_score",
+)
+
+
 def format_export_data(
     rows: List[Dict[str, Any]],
     socios_map: Optional[Dict[str, List[Dict[str, Any]]]] = None,
     mode: str = "commercial",
 ) -> pd.DataFrame:
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df = df.fillna("")
-    for col in [
-        "cnpj",
-        "razao_social",
-        "nome_fantasia",
-        "cnae_desc",
-        "porte",
-        "endereco_norm",
-        "municipio",
-        "uf",
-        "telefones_norm",
-        "emails_norm",
-        "socios_json",
-        "tech_stack_json",
-        "site",
-        "instagram",
-        "linkedin_company",
-        "linkedin_people_json",
-        "search_term_used",
-        "discovery_method",
-        "website_confidence",
-        "website_match_reasons",
-        "candidates_considered",
-        "excluded_candidates_count",
-        "golden_techs_found",
-        "tech_sources",
-        "score_version",
-        "score_reasons",
-        "flags_json",
-        "score_label",
-        "score_v2",
-        "google_maps_url",
-        "person_json",
-        "avatar_url",
-        "wealth_score",
-    ]:
-        if col not in df.columns:
-            df[col] = ""
-
-    def make_wa(phones: Any) -> str:
-        items = _coerce_list(phones)
-        if not items:
-            return ""
-        num = _digits_only(items[0])
-        if not num:
-            return ""
-        if num.startswith("55"):
-            return f"https://wa.me/{num}"
-        return f"https://wa.me/55{num}"
-
-    def make_phones(phones: Any) -> str:
-        items = _coerce_list(phones)
-        cleaned = [_digits_only(item) for item in items]
-        cleaned = [item for item in cleaned if item]
-        return ", ".join(cleaned)
+    present: Set[str] = set()
+    for row in rows:
+        present.update(row)
+    if not rows or not present:
+        return pd.DataFrame(rows)
+    # Only the columns the export reads are materialized, so wide payload rows never reach fillna.
+    df = pd.DataFrame(rows, columns=[col for col in _EXPORT_SOURCE_COLUMNS if col in present]).fillna("")
+    df = df.reindex(columns=_EXPORT_SOURCE_COLUMNS, fill_value="")
 
     def make_email(emails: Any) -> str:
         items = _coerce_list(emails)
@@ -294,29 +381,38 @@ def format_export_data(
             return ""
         return str(items[0])
 
-    def make_socios(cnpj: str, socios_raw: Any) -> str:
-        if socios_map and cnpj in socios_map:
-            return _format_socios(socios_map[cnpj])
-        return _format_socios(socios_raw)
-
-    df["Link WhatsApp"] = df["telefones_norm"].apply(make_wa)
-    df["Telefones"] = df["telefones_norm"].apply(make_phones)
-    df["E-mails"] = df["emails_norm"].apply(_format_emails)
-    df["socios"] = df.apply(
-        lambda row: make_socios(row.get("cnpj", ""), row.get("socios_json", "")),
-        axis=1,
-    )
-    df["cpf"] = df.apply(
-        lambda row: _format_cpfs(socios_map.get(row.get("cnpj"), [])) if socios_map else "",
-        axis=1,
-    )
+    phone_digits = _list_items(df["telefones_norm"]).str.replace(_NON_DIGIT_RE, "", regex=True)
+    first_phone = phone_digits[~phone_digits.index.duplicated()].reindex(df.index, fill_value="").infer_objects()
+    wa_number = first_phone.where(first_phone.str.startswith("55"), "55" + first_phone)
+    df["Link WhatsApp"] = ("https://wa.me/" + wa_number).where(first_phone != "", "")
+    df["Telefones"] = _join_items(phone_digits, df.index)
+    df["E-mails"] = _join_items(_list_items(df["emails_norm"]), df.index)
+    # Format each mapped CNPJ's socios once, however many rows repeat it.
+    mapped_cnpjs = [cnpj for cnpj in df["cnpj"].unique() if cnpj in socios_map] if socios_map else []
+    socios_by_cnpj = {cnpj: _format_socios(socios_map[cnpj]) for cnpj in mapped_cnpjs}
+    cpfs_by_cnpj = {cnpj: _format_cpfs(socios_map[cnpj]) for cnpj in mapped_cnpjs}
+    df["socios"] = [
+        socios_by_cnpj[cnpj] if cnpj in socios_by_cnpj else _format_socios(socios_raw)
+        for cnpj, socios_raw in zip(df["cnpj"], df["socios_json"])
+    ]
+    df["cpf"] = [cpfs_by_cnpj.get(cnpj, "") for cnpj in df["cnpj"]]
     df["avatar_url"] = df["avatar_url"].fillna("")
-    df["linkedin_profile"] = df.apply(_extract_linkedin_profile, axis=1)
-    df["wealth_score"] = df.apply(lambda row: _extract_wealth_score(row), axis=1)
+    # JSON columns read by several outputs are parsed once; the helpers accept parsed dicts as-is.
+    person_payloads = df["person_json"].map(_parse_json)
+    # Flag combinations repeat heavily, so equal strings share one parsed (read-only) dict.
+    flags = _map_distinct_strings(df["flags_json"], _parse_json)
+    # Zipping the needed columns avoids building a row Series per lead, which dominated apply(axis=1).
+    df["linkedin_profile"] = [
+        _extract_linkedin_profile(payload, people)
+        for payload, people in zip(person_payloads, df["linkedin_people_json"])
+    ]
+    df["wealth_score"] = [
+        _extract_wealth_score(raw, payload) for raw, payload in zip(df["wealth_score"], person_payloads)
+    ]
     df["cidade"] = df["municipio"]
-    df["Stack Tecnol\u00f3gico"] = df["tech_stack_json"].apply(_stack_summary)
-    df["whatsapp_probable"] = df["flags_json"].apply(lambda value: _flag_value(value, "whatsapp_probable"))
-    df["flags achatadas"] = df["flags_json"].apply(_flatten_flags)
+    df["Stack Tecnol\u00f3gico"] = _map_distinct_strings(df["tech_stack_json"], _stack_summary)
+    df["whatsapp_probable"] = flags.map(lambda parsed: "true" if parsed.get("whatsapp_probable") else "")
+    df["flags achatadas"] = flags.map(lambda parsed: ", ".join(sorted(key for key, val in parsed.items() if val)))
     df["score"] = df["score_v2"]
 
     export_columns = [
@@ -365,7 +461,7 @@ def format_export_data(
         "tech_sources",
         "score_reasons",
     ]:
-        df[col] = df[col].apply(_format_list)
+        df[col] = _map_distinct_strings(df[col], _format_list)
 
     columns = export_columns + (debug_columns if mode == "debug" else [])
     return df[columns]
@@ -399,15 +495,15 @@ def export_to_meta_ads(
                     inner = raw_str[1:-1].strip()
                     if inner:
                         items = [part.strip().strip("\"'") for part in inner.split(",") if part.strip()]
-                if items == [raw] and re.search(r"[;,]", raw_str):
-                    items = [part.strip() for part in re.split(r"[;,]", raw_str) if part.strip()]
+                if items == [raw] and _EMAIL_SEPARATOR_RE.search(raw_str):
+                    items = [part.strip() for part in _EMAIL_SEPARATOR_RE.split(raw_str) if part.strip()]
             for item in items:
                 if item:
                     values.append(str(item))
 
         flat = row.get("E-mails") or row.get("emails_flat")
         if flat:
-            for part in re.split(r"[;,]", str(flat)):
+            for part in _EMAIL_SEPARATOR_RE.split(str(flat)):
                 if part.strip():
                     values.append(part.strip())
 
@@ -504,7 +600,7 @@ def export_to_meta_ads(
         return str(best).strip()
 
     def _split_name(full_name: str) -> Tuple[str, str]:
-        parts = [part for part in re.split(r"\s+", full_name.strip()) if part]
+        parts = [part for part in _WHITESPACE_RE.split(full_name.strip()) if part]
         if len(parts) >= 2:
             return parts[0].title(), " ".join(parts[1:]).title()
         if parts:
@@ -515,7 +611,7 @@ def export_to_meta_ads(
         if not email or "@" not in email:
             return ""
         local = email.split("@")[0]
-        parts = [part for part in re.split(r"[._-]+", local) if part]
+        parts = [part for part in _EMAIL_LOCAL_SEPARATOR_RE.split(local) if part]
         if not parts:
             return ""
         return " ".join(parts)
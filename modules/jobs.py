@@ -1,306 +1,451 @@
 """Background job orchestration for Hunter OS."""
 
 import asyncio
+import atexit
+import heapq
 import json
+import logging
+import multiprocessing
 import os
+import queue
 import threading
 import time
 import traceback
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
 
 from modules import cleaning, data_sources, enrichment_async, providers, scoring, storage
 
+logger = logging.getLogger("hunter")
+
 _job_registry: Dict[str, Dict[str, Any]] = {}
+_job_registry_lock = threading.Lock()
+
+LOG_FLUSH_MAX = 100
+# Job log events are written by one background thread so pipeline steps don't wait on SQLite commits.
+_log_queue: "queue.Queue[Tuple[str, str, str, Dict[str, Any]]]" = queue.Queue()
+_log_writer: Optional[threading.Thread] = None
+_log_writer_lock = threading.Lock()
+
+
+def _fmt_ts(ts: float) -> str:
+    # Same UTC layout as storage._utcnow, for step start times and cutoffs.
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+
+def _drain_log_queue() -> None:
+    while True:
+        batch = [_log_queue.get()]
+        while len(batch) < LOG_FLUSH_MAX:
+            try:
+                batch.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            storage.log_events(batch)
+        except Exception:
+            logger.exception("job log flush failed (%s events)", len(batch))
+        finally:
+            for _ in batch:
+                _log_queue.task_done()
+
+
+def _log_event(level: str, event: str, detail: Dict[str, Any]) -> None:
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = threading.Thread(target=_drain_log_queue, name="hunter-job-logs", daemon=True)
+            _log_writer.start()
+    # Stamped here, not at flush, so created_at reflects when the event happened.
+    _log_queue.put((storage._utcnow(), level, event, detail))
+
+
+def flush_log_events() -> None:
+    if _log_writer is not None:
+        _log_queue.join()
+
+
+# The writer is a daemon thread; drain what is queued before the interpreter exits.
+atexit.register(flush_log_events)
 
 
 def _update_status(run_id: str, status: str, **extra: Any) -> None:
     storage.update_run(run_id, status=status, **extra)
-    storage.log_event("info", "run_status", {"run_id": run_id, "status": status, **extra})
+    _log_event("info", "run_status", {"run_id": run_id, "status": status, **extra})
 
 
 def _log_info(run_id: str, event: str, message: str, **extra: Any) -> None:
-    storage.log_event("info", event, {"run_id": run_id, "message": message, **extra})
+    _log_event("info", event, {"run_id": run_id, "message": message, **extra})
 
 
 def _log_warning(run_id: str, event: str, message: str, **extra: Any) -> None:
-    storage.log_event("warning", event, {"run_id": run_id, "message": message, **extra})
+    _log_event("warning", event, {"run_id": run_id, "message": message, **extra})
 
-def _process_leads(
-    run_id: str,
-    params: Dict[str, Any],
+
+# Opt-in: run cleaning + score v1 in a worker process so large batches don't hold the server's GIL.
+CPU_OFFLOAD = os.getenv("HUNTER_CPU_OFFLOAD", "0") == "1"
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_cpu_pool_lock = threading.Lock()
+
+
+def _get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    with _cpu_pool_lock:
+        if _cpu_pool is None:
+            # spawn: forking a process that already runs server and job threads is unsafe.
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _cpu_pool
+
+
+def _reset_cpu_pool() -> None:
+    global _cpu_pool
+    with _cpu_pool_lock:
+        # A broken pool rejects every later submit; drop it so the next run spawns a fresh one.
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+
+
+def _clean_and_score(
     leads_raw: List[Dict[str, Any]],
-    cancel_event: threading.Event,
-) -> Dict[str, Any]:
-    _update_status(run_id, "cleaning", total_leads=len(leads_raw))
-    _log_info(
-        run_id,
-        "cleaning_start",
-        "Iniciando limpeza e deduplicacao dos leads coletados.",
-        total_leads=len(leads_raw),
-    )
-    step_start = time.time()
+    exclude_mei: bool,
+    min_repeat: int,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     cleaned, clean_stats = cleaning.clean_batch(
         leads_raw,
-        exclude_mei=params["excluir_mei"],
-        min_repeat=params["telefone_repeat_threshold"],
+        exclude_mei=exclude_mei,
+        min_repeat=min_repeat,
         return_stats=True,
+        score_v1=scoring.score_v1,
     )
-    storage.upsert_socios_from_leads(cleaned)
-    storage.record_run_step(
-        run_id=run_id,
-        step_name="cleaning",
-        status="completed",
-        started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
-        ended_at=storage._utcnow(),
-        duration_ms=int((time.time() - step_start) * 1000),
-        details=clean_stats,
-    )
-    _log_info(
-        run_id,
-        "cleaning_summary",
-        "Limpeza concluida.",
-        input_count=clean_stats.get("input_count"),
-        output_count=clean_stats.get("output_count"),
-        removed_mei=clean_stats.get("removed_mei"),
-        removed_other=clean_stats.get("removed_other"),
-    )
+    return cleaned, clean_stats
 
-    for lead in cleaned:
-        lead["score_v1"] = scoring.score_v1(lead)
 
-    storage.upsert_leads_clean(cleaned)
+def _run_clean_and_score(
+    run_id: str,
+    leads_raw: List[Dict[str, Any]],
+    exclude_mei: bool,
+    min_repeat: int,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    if CPU_OFFLOAD and leads_raw:
+        try:
+            return _get_cpu_pool().submit(_clean_and_score, leads_raw, exclude_mei, min_repeat).result()
+        except BrokenProcessPool as exc:
+            _reset_cpu_pool()
+            _log_warning(
+                run_id,
+                "cpu_offload_failed",
+                "Pool de processos indisponivel; limpeza no processo atual.",
+                error=str(exc),
+            )
+    return _clean_and_score(leads_raw, exclude_mei, min_repeat)
 
-    if cancel_event.is_set():
-        _update_status(run_id, "canceled")
-        return {
-            "enriched_results": [],
-            "enrich_stats": {
-                "provider_error": None,
-                "provider_error_count": 0,
-                "skipped_due_to_provider_error": False,
-            },
-            "paused_provider_limit": False,
-            "planned_to_enrich": 0,
-            "remaining_to_enrich": 0,
-            "strategy": "canceled",
-        }
 
-    _update_status(run_id, "scoring_v1")
-    storage.record_run_step(
-        run_id=run_id,
-        step_name="scoring_v1",
-        status="completed",
-        started_at=storage._utcnow(),
-        ended_at=storage._utcnow(),
-        duration_ms=0,
-        details={"leads": len(cleaned)},
-    )
-    _log_info(
-        run_id,
-        "scoring_v1_summary",
-        "Score v1 concluido.",
-        leads=len(cleaned),
-    )
+def _warm_cpu_pool() -> None:
+    # A spawned worker pays interpreter start + imports on its first task; an empty batch
+    # submitted now pays that while extraction or file import is still running.
+    if not CPU_OFFLOAD:
+        return
+    try:
+        _get_cpu_pool().submit(_clean_and_score, [], True, 0)
+    except BrokenProcessPool:
+        # Left broken by an earlier run; the next _get_cpu_pool() spawns a fresh pool.
+        _reset_cpu_pool()
 
-    top_pct = params.get("enrich_top_pct", 25)
-    sorted_clean = sorted(cleaned, key=lambda x: x.get("score_v1", 0), reverse=True)
-    top_n = max(1, int(len(sorted_clean) * top_pct / 100)) if sorted_clean else 0
-    to_enrich = sorted_clean[:top_n]
-    planned_to_enrich = len(to_enrich)
-    strategy = params.get("enrich_strategy") or "default"
-
-    safe_limit = params.get("safe_enrich_limit")
-    if safe_limit:
-        safe_limit = int(safe_limit)
-        if safe_limit > 0:
-            to_enrich = to_enrich[:safe_limit]
-            planned_to_enrich = len(to_enrich)
-            strategy = f"safe_limit_{safe_limit}"
 
+def _process_leads(
+    run_id: str,
+    params: Dict[str, Any],
+    leads_raw: List[Dict[str, Any]],
+    cancel_event: threading.Event,
+) -> Dict[str, Any]:
+    # Run parameters used across the steps below, resolved once.
+    excluir_mei = params["excluir_mei"]
+    min_repeat = params["telefone_repeat_threshold"]
+    top_pct = params.get("enrich_top_pct", 25)
+    enable_enrichment = bool(params.get("enable_enrichment"))
+    provider_name = params.get("provider")
+    concurrency = params.get("concurrency", 10)
+    timeout = params.get("timeout", 5)
+    cache_ttl_hours = params.get("cache_ttl_hours", 24)
     cache_only = bool(params.get("cache_only"))
-    if cache_only and to_enrich:
-        cutoff = time.time() - (params.get("cache_ttl_hours", 24) * 3600)
-        cached = storage.fetch_enrichments_by_cnpjs([lead.get("cnpj") for lead in to_enrich])
-        fresh = []
-        for lead in to_enrich:
-            cached_item = cached.get(lead.get("cnpj"))
-            enriched_at = cached_item.get("enriched_at") if cached_item else None
-            if enriched_at:
-                try:
-                    ts = time.mktime(time.strptime(enriched_at, "%Y-%m-%d %H:%M:%S"))
-                except Exception:
-                    ts = 0
-                if ts >= cutoff:
-                    fresh.append(lead)
-        to_enrich = fresh
-        planned_to_enrich = len(to_enrich)
-        strategy = "cache_only"
 
-    storage.update_run(
+    _update_status(run_id, "cleaning", total_leads=len(leads_raw))
+    _log_info(
         run_id,
-        planned_to_enrich=planned_to_enrich,
-        remaining_to_enrich=planned_to_enrich,
-        strategy=strategy,
+        "cleaning_start",
+        "Iniciando limpeza e deduplicacao dos leads coletados.",
+        total_leads=len(leads_raw),
     )
-    _log_info(
+    step_start = time.time()
+    cleaned, clean_stats = _run_clean_and_score(
         run_id,
-        "enrich_plan",
-        "Planejamento de enriquecimento definido.",
-        planned_to_enrich=planned_to_enrich,
-        strategy=strategy,
+        leads_raw,
+        excluir_mei,
+        min_repeat,
     )
-    if safe_limit:
+    # Every exit below (cancel, provider pause, an error in any step) must leave the cleaned leads stored.
+    leads_written = False
+    try:
+        storage.upsert_socios_from_leads(cleaned)
+        storage.record_run_step(
+            run_id=run_id,
+            step_name="cleaning",
+            status="completed",
+            started_at=_fmt_ts(step_start),
+            ended_at=storage._utcnow(),
+            duration_ms=int((time.time() - step_start) * 1000),
+            details=clean_stats,
+        )
         _log_info(
             run_id,
-            "enrich_safe_mode",
-            "Modo seguro ativo: limitando o enriquecimento.",
-            safe_limit=safe_limit,
+            "cleaning_summary",
+            "Limpeza concluida.",
+            input_count=clean_stats.get("input_count"),
+            output_count=clean_stats.get("output_count"),
+            removed_mei=clean_stats.get("removed_mei"),
+            removed_other=clean_stats.get("removed_other"),
+        )
+
+        # Enrichment can run for a long time (and pause or be canceled), so v1 scores are persisted first.
+        # Without it the scoring-v2 write follows immediately and is the only one.
+        if enable_enrichment:
+            storage.upsert_leads_clean(cleaned)
+            leads_written = True
+
+        if cancel_event.is_set():
+            _update_status(run_id, "canceled")
+            return {
+                "enriched_results": [],
+                "enrich_stats": {
+                    "provider_error": None,
+                    "provider_error_count": 0,
+                    "skipped_due_to_provider_error": False,
+                },
+                "paused_provider_limit": False,
+                "planned_to_enrich": 0,
+                "remaining_to_enrich": 0,
+                "strategy": "canceled",
+            }
+
+        _update_status(run_id, "scoring_v1")
+        storage.record_run_step(
+            run_id=run_id,
+            step_name="scoring_v1",
+            status="completed",
+            started_at=storage._utcnow(),
+            ended_at=storage._utcnow(),
+            duration_ms=0,
+            details={"leads": len(cleaned)},
         )
-    if cache_only:
         _log_info(
             run_id,
-            "enrich_cache_only",
-            "Modo seguro ativo: somente cache (sem chamadas externas).",
-            cache_ttl_hours=params.get("cache_ttl_hours", 24),
+            "scoring_v1_summary",
+            "Score v1 concluido.",
+            leads=len(cleaned),
         )
 
-    enriched_results: List[Dict[str, Any]] = []
-    enrich_stats = {
-        "provider_error": None,
-        "provider_error_count": 0,
-        "skipped_due_to_provider_error": False,
-        "processed_count": 0,
-        "errors_count": 0,
-        "cache_hits": 0,
-        "avg_fetch_ms": 0,
-        "provider_limit_hit": False,
-        "provider_http_status": None,
-        "provider_message": None,
-        "provider_backoff_seconds": None,
-    }
-    if params.get("enable_enrichment") and to_enrich:
-        _update_status(
+        top_n = max(1, int(len(cleaned) * top_pct / 100)) if cleaned else 0
+        # nlargest keeps a top_n heap and matches sorted(reverse=True)[:top_n], ties included.
+        if top_n < len(cleaned):
+            to_enrich = heapq.nlargest(top_n, cleaned, key=lambda x: x.get("score_v1", 0))
+        else:
+            to_enrich = sorted(cleaned, key=lambda x: x.get("score_v1", 0), reverse=True)
+        planned_to_enrich = len(to_enrich)
+        strategy = params.get("enrich_strategy") or "default"
+
+        safe_limit = params.get("safe_enrich_limit")
+        if safe_limit:
+            safe_limit = int(safe_limit)
+            if safe_limit > 0:
+                to_enrich = to_enrich[:safe_limit]
+                planned_to_enrich = len(to_enrich)
+                strategy = f"safe_limit_{safe_limit}"
+
+        if cache_only and to_enrich:
+            # enriched_at is stored as UTC "%Y-%m-%d %H:%M:%S", so freshness is a string comparison in SQL.
+            cutoff = _fmt_ts(time.time() - cache_ttl_hours * 3600)
+            cached = storage.fetch_enrichments_by_cnpjs([lead.get("cnpj") for lead in to_enrich], fresh_since=cutoff)
+            to_enrich = [lead for lead in to_enrich if lead.get("cnpj") in cached]
+            planned_to_enrich = len(to_enrich)
+            strategy = "cache_only"
+
+        storage.update_run(
             run_id,
-            "enriching",
             planned_to_enrich=planned_to_enrich,
             remaining_to_enrich=planned_to_enrich,
             strategy=strategy,
         )
         _log_info(
             run_id,
-            "enrichment_start",
-            "Iniciando enriquecimento externo.",
-            provider=params.get("provider"),
-            alvo_enriquecimento=len(to_enrich),
-        )
-        step_start = time.time()
-        provider = providers.select_provider(params["provider"])
-        enricher = enrichment_async.AsyncEnricher(
-            provider=provider,
-            concurrency=params.get("concurrency", 10),
-            timeout=params.get("timeout", 5),
-            cache_ttl_hours=params.get("cache_ttl_hours", 24),
+            "enrich_plan",
+            "Planejamento de enriquecimento definido.",
+            planned_to_enrich=planned_to_enrich,
+            strategy=strategy,
         )
+        if safe_limit:
+            _log_info(
+                run_id,
+                "enrich_safe_mode",
+                "Modo seguro ativo: limitando o enriquecimento.",
+                safe_limit=safe_limit,
+            )
+        if cache_only:
+            _log_info(
+                run_id,
+                "enrich_cache_only",
+                "Modo seguro ativo: somente cache (sem chamadas externas).",
+                cache_ttl_hours=cache_ttl_hours,
+            )
 
-        async_cancel = asyncio.Event()
-        if cancel_event.is_set():
-            async_cancel.set()
+        enriched_results: List[Dict[str, Any]] = []
+        enrich_stats = {
+            "provider_error": None,
+            "provider_error_count": 0,
+            "skipped_due_to_provider_error": False,
+            "processed_count": 0,
+            "errors_count": 0,
+            "cache_hits": 0,
+            "avg_fetch_ms": 0,
+            "provider_limit_hit": False,
+            "provider_http_status": None,
+            "provider_message": None,
+            "provider_backoff_seconds": None,
+        }
+        if enable_enrichment and to_enrich:
+            _update_status(
+                run_id,
+                "enriching",
+                planned_to_enrich=planned_to_enrich,
+                remaining_to_enrich=planned_to_enrich,
+                strategy=strategy,
+            )
+            _log_info(
+                run_id,
+                "enrichment_start",
+                "Iniciando enriquecimento externo.",
+                provider=provider_name,
+                alvo_enriquecimento=len(to_enrich),
+            )
+            step_start = time.time()
+            provider = providers.select_provider(provider_name)
+            enricher = enrichment_async.AsyncEnricher(
+                provider=provider,
+                concurrency=concurrency,
+                timeout=timeout,
+                cache_ttl_hours=cache_ttl_hours,
+            )
 
-        enriched_results, enrich_stats = asyncio.run(enricher.enrich_batch(to_enrich, run_id, cancel_event=async_cancel))
+            async_cancel = asyncio.Event()
+            if cancel_event.is_set():
+                async_cancel.set()
 
-        for item in enriched_results:
-            storage.upsert_enrichment(item.get("cnpj"), item)
+            enriched_results, enrich_stats = enricher.run_batch(to_enrich, run_id, cancel_event=async_cancel)
 
-        step_status = "completed"
-        if enrich_stats.get("provider_limit_hit"):
-            step_status = "paused_provider_limit"
-        storage.record_run_step(
-            run_id=run_id,
-            step_name="enriching",
-            status=step_status,
-            started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
-            ended_at=storage._utcnow(),
-            duration_ms=int((time.time() - step_start) * 1000),
-            details={
-                "alvo_enriquecimento": len(to_enrich),
-                "enriquecidos": len(enriched_results),
-                "top_pct": top_pct,
-                "provider_error": enrich_stats.get("provider_error"),
-                "provider_error_count": enrich_stats.get("provider_error_count"),
-                "skipped_due_to_provider_error": enrich_stats.get("skipped_due_to_provider_error"),
-                "processed_count": enrich_stats.get("processed_count"),
-                "errors_count": enrich_stats.get("errors_count"),
-                "cache_hits": enrich_stats.get("cache_hits"),
-                "avg_fetch_ms": enrich_stats.get("avg_fetch_ms"),
-                "provider_http_status": enrich_stats.get("provider_http_status"),
-                "provider_message": enrich_stats.get("provider_message"),
-                "provider_backoff_seconds": enrich_stats.get("provider_backoff_seconds"),
-                "planned_to_enrich": planned_to_enrich,
-                "strategy": strategy,
-            },
-        )
-        _log_info(
-            run_id,
-            "enrichment_summary",
-            "Enriquecimento concluido.",
-            enriquecidos=len(enriched_results),
-            alvo_enriquecimento=len(to_enrich),
-            provider=params.get("provider"),
-            provider_error=enrich_stats.get("provider_error"),
-            cache_hits=enrich_stats.get("cache_hits"),
-            errors_count=enrich_stats.get("errors_count"),
-            avg_fetch_ms=enrich_stats.get("avg_fetch_ms"),
-        )
-        if enrich_stats.get("provider_error"):
-            _log_warning(
+            storage.upsert_enrichments(enriched_results)
+
+            step_status = "completed"
+            if enrich_stats.get("provider_limit_hit"):
+                step_status = "paused_provider_limit"
+            storage.record_run_step(
+                run_id=run_id,
+                step_name="enriching",
+                status=step_status,
+                started_at=_fmt_ts(step_start),
+                ended_at=storage._utcnow(),
+                duration_ms=int((time.time() - step_start) * 1000),
+                details={
+                    "alvo_enriquecimento": len(to_enrich),
+                    "enriquecidos": len(enriched_results),
+                    "top_pct": top_pct,
+                    "provider_error": enrich_stats.get("provider_error"),
+                    "provider_error_count": enrich_stats.get("provider_error_count"),
+                    "skipped_due_to_provider_error": enrich_stats.get("skipped_due_to_provider_error"),
+                    "processed_count": enrich_stats.get("processed_count"),
+                    "errors_count": enrich_stats.get("errors_count"),
+                    "cache_hits": enrich_stats.get("cache_hits"),
+                    "avg_fetch_ms": enrich_stats.get("avg_fetch_ms"),
+                    "provider_http_status": enrich_stats.get("provider_http_status"),
+                    "provider_message": enrich_stats.get("provider_message"),
+                    "provider_backoff_seconds": enrich_stats.get("provider_backoff_seconds"),
+                    "planned_to_enrich": planned_to_enrich,
+                    "strategy": strategy,
+                },
+            )
+            _log_info(
                 run_id,
-                "enrichment_paused",
-                "Enriquecimento pausado por erro do provider.",
-                provider=params.get("provider"),
-                error=enrich_stats.get("provider_error"),
+                "enrichment_summary",
+                "Enriquecimento concluido.",
+                enriquecidos=len(enriched_results),
+                alvo_enriquecimento=len(to_enrich),
+                provider=provider_name,
+                provider_error=enrich_stats.get("provider_error"),
+                cache_hits=enrich_stats.get("cache_hits"),
+                errors_count=enrich_stats.get("errors_count"),
+                avg_fetch_ms=enrich_stats.get("avg_fetch_ms"),
             )
+            if enrich_stats.get("provider_error"):
+                _log_warning(
+                    run_id,
+                    "enrichment_paused",
+                    "Enriquecimento pausado por erro do provider.",
+                    provider=provider_name,
+                    error=enrich_stats.get("provider_error"),
+                )
+
+            if enrich_stats.get("provider_limit_hit"):
+                remaining = max(planned_to_enrich - len(enriched_results), 0)
+                return {
+                    "enriched_results": enriched_results,
+                    "enrich_stats": enrich_stats,
+                    "paused_provider_limit": True,
+                    "planned_to_enrich": planned_to_enrich,
+                    "remaining_to_enrich": remaining,
+                    "strategy": strategy,
+                }
 
-        if enrich_stats.get("provider_limit_hit"):
+        if cancel_event.is_set():
+            _update_status(run_id, "canceled")
             remaining = max(planned_to_enrich - len(enriched_results), 0)
             return {
                 "enriched_results": enriched_results,
                 "enrich_stats": enrich_stats,
-                "paused_provider_limit": True,
+                "paused_provider_limit": False,
                 "planned_to_enrich": planned_to_enrich,
                 "remaining_to_enrich": remaining,
                 "strategy": strategy,
             }
 
-    if cancel_event.is_set():
-        _update_status(run_id, "canceled")
-        remaining = max(planned_to_enrich - len(enriched_results), 0)
-        return {
-            "enriched_results": enriched_results,
-            "enrich_stats": enrich_stats,
-            "paused_provider_limit": False,
-            "planned_to_enrich": planned_to_enrich,
-            "remaining_to_enrich": remaining,
-            "strategy": strategy,
-        }
-
-    _update_status(run_id, "scoring_v2")
-    step_start = time.time()
+        _update_status(run_id, "scoring_v2")
+        step_start = time.time()
 
-    enrichment_map = {item.get("cnpj"): item for item in enriched_results}
-    for lead in cleaned:
-        enrichment = enrichment_map.get(lead.get("cnpj"), {})
-        score, reasons, version = scoring.score_with_reasons(lead, enrichment)
-        lead["score_v2"] = score
-        lead["score_label"] = scoring.label(score)
-        if lead.get("cnpj") in enrichment_map:
-            storage.update_enrichment_scoring(lead.get("cnpj"), version, reasons)
+        # Cleaning already reduced CNPJs to digits and enrichment results carry the lead's own CNPJ,
+        # so the raw value is the key: one lookup per lead, no re-normalization.
+        enrichment_map = {item.get("cnpj"): item for item in enriched_results}
+        for lead in cleaned:
+            cnpj = lead.get("cnpj")
+            enrichment = enrichment_map.get(cnpj)
+            score, reasons, version = scoring.score_with_reasons(lead, enrichment or {})
+            lead["score_v2"] = score
+            lead["score_label"] = scoring.label(score)
+            if enrichment is not None:
+                storage.update_enrichment_scoring(cnpj, version, reasons)
+
+        storage.upsert_leads_clean(cleaned)
+        leads_written = True
+    finally:
+        if not leads_written:
+            storage.upsert_leads_clean(cleaned)
 
-    storage.upsert_leads_clean(cleaned)
     storage.record_run_step(
         run_id=run_id,
         step_name="scoring_v2",
         status="completed",
-        started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
+        started_at=_fmt_ts(step_start),
         ended_at=storage._utcnow(),
         duration_ms=int((time.time() - step_start) * 1000),
         details={"leads": len(cleaned)},
@@ -432,7 +577,7 @@ def _run_pipeline(run_id: str, params: Dict[str, Any], cancel_event: threading.E
                 run_id=run_id,
                 step_name="export_create_v5",
                 status="completed",
-                started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
+                started_at=_fmt_ts(step_start),
                 ended_at=storage._utcnow(),
                 duration_ms=int((time.time() - step_start) * 1000),
                 details={
@@ -456,6 +601,7 @@ def _run_pipeline(run_id: str, params: Dict[str, Any], cancel_event: threading.E
             limite=params.get("limite"),
             page_size=params.get("page_size"),
         )
+        _warm_cpu_pool()
         step_start = time.time()
         leads_raw, telemetry, source = data_sources.extract_leads(
             uf=params["uf"],
@@ -474,7 +620,7 @@ def _run_pipeline(run_id: str, params: Dict[str, Any], cancel_event: threading.E
             run_id=run_id,
             step_name="extract",
             status="completed",
-            started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
+            started_at=_fmt_ts(step_start),
             ended_at=storage._utcnow(),
             duration_ms=int((time.time() - step_start) * 1000),
             details={
@@ -503,7 +649,7 @@ def _run_pipeline(run_id: str, params: Dict[str, Any], cancel_event: threading.E
         process_result = _process_leads(run_id, params, leads_raw, cancel_event)
         _finalize_run(run_id, process_result, len(leads_raw), "Run concluido.")
     except data_sources.CasaDosDadosBalanceError as exc:
-        storage.log_event(
+        _log_event(
             "error",
             "run_failed",
             {"run_id": run_id, "error": str(exc), "error_code": "no_balance"},
@@ -512,20 +658,35 @@ def _run_pipeline(run_id: str, params: Dict[str, Any], cancel_event: threading.E
         _update_status(run_id, "failed", errors_count=1)
         return
     except Exception as exc:
-        storage.log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
+        _log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
         storage.record_error(run_id, "pipeline", str(exc), traceback.format_exc())
         _update_status(run_id, "failed", errors_count=1)
 
 
+def register_job(run_id: str, thread: threading.Thread, cancel_event: threading.Event) -> None:
+    # Shared by this module and etl_pipeline; run ids are unique, so one registry serves both.
+    with _job_registry_lock:
+        # Drop finished jobs so the registry only tracks live threads in long-lived processes.
+        for finished_id in [key for key, job in _job_registry.items() if not job["thread"].is_alive()]:
+            del _job_registry[finished_id]
+        _job_registry[run_id] = {
+            "thread": thread,
+            "cancel_event": cancel_event,
+        }
+        # Started under the lock so a concurrent reap never sees it registered but not yet alive.
+        thread.start()
+
+
+def get_job(run_id: str) -> Optional[Dict[str, Any]]:
+    with _job_registry_lock:
+        return _job_registry.get(run_id)
+
+
 def start_run(params: Dict[str, Any]) -> str:
     run_id = storage.create_run(params)
     cancel_event = threading.Event()
     thread = threading.Thread(target=_run_pipeline, args=(run_id, params, cancel_event), daemon=True)
-    _job_registry[run_id] = {
-        "thread": thread,
-        "cancel_event": cancel_event,
-    }
-    thread.start()
+    register_job(run_id, thread, cancel_event)
     return run_id
 
 
@@ -542,15 +703,19 @@ def _run_recovery(run_id: str, params: Dict[str, Any], arquivo_uuid: str, cancel
         if not files:
             raise RuntimeError("Arquivo CSV nao encontrado para o export selecionado")
         file_path = files[0]["file_path"]
+        _warm_cpu_pool()
         step_start = time.time()
-        leads_raw = data_sources.parse_export_csv(file_path)
         source = f"export_csv:{arquivo_uuid}"
-        storage.insert_leads_raw(leads_raw, source, run_id=run_id, export_uuid=arquivo_uuid)
+        leads_raw: List[Dict[str, Any]] = []
+        # Rows are stored chunk by chunk as the CSV is read; cleaning still needs the whole batch.
+        for chunk in data_sources.iter_export_csv(file_path):
+            storage.insert_leads_raw(chunk, source, run_id=run_id, export_uuid=arquivo_uuid)
+            leads_raw.extend(chunk)
         storage.record_run_step(
             run_id=run_id,
             step_name="import_csv",
             status="completed",
-            started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
+            started_at=_fmt_ts(step_start),
             ended_at=storage._utcnow(),
             duration_ms=int((time.time() - step_start) * 1000),
             details={"arquivo_uuid": arquivo_uuid, "file_path": file_path, "rows": len(leads_raw)},
@@ -572,7 +737,7 @@ def _run_recovery(run_id: str, params: Dict[str, Any], arquivo_uuid: str, cancel
         process_result = _process_leads(run_id, params, leads_raw, cancel_event)
         _finalize_run(run_id, process_result, len(leads_raw), "Recovery concluido.")
     except Exception as exc:
-        storage.log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
+        _log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
         storage.record_error(run_id, "recovery", str(exc), traceback.format_exc())
         _update_status(run_id, "failed", errors_count=1)
 
@@ -585,11 +750,7 @@ def start_recovery(arquivo_uuid: str, params: Dict[str, Any]) -> str:
         args=(run_id, params, arquivo_uuid, cancel_event),
         daemon=True,
     )
-    _job_registry[run_id] = {
-        "thread": thread,
-        "cancel_event": cancel_event,
-    }
-    thread.start()
+    register_job(run_id, thread, cancel_event)
     return run_id
 
 
@@ -603,6 +764,7 @@ def _run_excel_import(run_id: str, params: Dict[str, Any], file_path: str, cance
             file_path=file_path,
             cnpj_column=params.get("cnpj_column"),
         )
+        _warm_cpu_pool()
         step_start = time.time()
         leads_raw = data_sources.parse_excel_file(file_path, cnpj_column=params.get("cnpj_column"))
         if not leads_raw:
@@ -613,7 +775,7 @@ def _run_excel_import(run_id: str, params: Dict[str, Any], file_path: str, cance
             run_id=run_id,
             step_name="import_excel",
             status="completed",
-            started_at=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(step_start)),
+            started_at=_fmt_ts(step_start),
             ended_at=storage._utcnow(),
             duration_ms=int((time.time() - step_start) * 1000),
             details={
@@ -639,7 +801,7 @@ def _run_excel_import(run_id: str, params: Dict[str, Any], file_path: str, cance
         process_result = _process_leads(run_id, params, leads_raw, cancel_event)
         _finalize_run(run_id, process_result, len(leads_raw), "Importacao Excel concluida.")
     except Exception as exc:
-        storage.log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
+        _log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
         storage.record_error(run_id, "import_excel", str(exc), traceback.format_exc())
         _update_status(run_id, "failed", errors_count=1)
 
@@ -652,11 +814,7 @@ def start_excel_import(file_path: str, params: Dict[str, Any]) -> str:
         args=(run_id, params, file_path, cancel_event),
         daemon=True,
     )
-    _job_registry[run_id] = {
-        "thread": thread,
-        "cancel_event": cancel_event,
-    }
-    thread.start()
+    register_job(run_id, thread, cancel_event)
     return run_id
 
 
@@ -674,7 +832,7 @@ def _run_resume(run_id: str, params: Dict[str, Any], cancel_event: threading.Eve
         process_result = _process_leads(run_id, params, leads_raw, cancel_event)
         _finalize_run(run_id, process_result, len(leads_raw), "Run retomado e concluido.")
     except Exception as exc:
-        storage.log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
+        _log_event("error", "run_failed", {"run_id": run_id, "error": str(exc)})
         storage.record_error(run_id, "resume", str(exc), traceback.format_exc())
         _update_status(run_id, "failed", errors_count=1)
 
@@ -692,23 +850,19 @@ def resume_run(run_id: str) -> Optional[str]:
         return None
     cancel_event = threading.Event()
     thread = threading.Thread(target=_run_resume, args=(run_id, params, cancel_event), daemon=True)
-    _job_registry[run_id] = {
-        "thread": thread,
-        "cancel_event": cancel_event,
-    }
-    thread.start()
+    register_job(run_id, thread, cancel_event)
     return run_id
 
 
 def cancel_run(run_id: str) -> None:
-    job = _job_registry.get(run_id)
+    job = get_job(run_id)
     if job:
         job["cancel_event"].set()
         storage.update_run(run_id, status="canceled")
 
 
 def is_running(run_id: str) -> bool:
-    job = _job_registry.get(run_id)
+    job = get_job(run_id)
     if not job:
         return False
     return job["thread"].is_alive()
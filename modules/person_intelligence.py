@@ -1,5 +1,6 @@
 """Person intelligence helpers for Hunter OS."""
 
+import asyncio
 import hashlib
 import json
 import logging
@@ -440,49 +441,65 @@ class PersonIntelligence:
 
         return payload
 
+    def has_socios(self, lead: Dict[str, Any]) -> bool:
+        return bool(_extract_socios(lead))
+
+    async def fetch_lead_avatar(self, session: aiohttp.ClientSession, lead: Dict[str, Any]) -> Optional[str]:
+        phone_e164 = self._select_phone(lead)
+        if not phone_e164:
+            return None
+        start = time.time()
+        avatar_url = await self.fetch_avatar(session, phone_e164)
+        duration_ms = round((time.time() - start) * 1000, 2)
+        if avatar_url:
+            try:
+                from modules.telemetry import logger as telemetry_logger
+
+                telemetry_logger.info(
+                    f"Avatar baixado em {duration_ms}ms",
+                    extra={
+                        "event_type": "api",
+                        "latency_ms": duration_ms,
+                        "provider": "Evolution/Baileys",
+                    },
+                )
+            except Exception:
+                pass
+        return avatar_url
+
     async def enrich(
         self,
         session: aiohttp.ClientSession,
         lead: Dict[str, Any],
         enrichment: Optional[Dict[str, Any]] = None,
+        avatar_task: Optional["asyncio.Task[Optional[str]]"] = None,
     ) -> Dict[str, Any]:
-        socios = _extract_socios(lead)
-        if not socios:
-            return {"wealth_score": 0, "avatar_url": None, "person_json": {}}
-
-        shares = _resolve_shares(socios)
-        person_payload = self._build_person_payload(lead, enrichment, socios, shares)
-
-        wealth_score = 0.0
-        primary = person_payload.get("primary") if isinstance(person_payload, dict) else {}
-        if isinstance(primary, dict):
-            wealth_score = _safe_float(primary.get("wealth_estimate"))
-
-        avatar_url = None
-        phone_e164 = self._select_phone(lead)
-        if phone_e164:
-            start = time.time()
-            avatar_url = await self.fetch_avatar(session, phone_e164)
-            duration_ms = round((time.time() - start) * 1000, 2)
+        try:
+            socios = _extract_socios(lead)
+            if not socios:
+                return {"wealth_score": 0, "avatar_url": None, "person_json": {}}
+
+            shares = _resolve_shares(socios)
+            person_payload = self._build_person_payload(lead, enrichment, socios, shares)
+
+            wealth_score = 0.0
+            primary = person_payload.get("primary") if isinstance(person_payload, dict) else {}
+            if isinstance(primary, dict):
+                wealth_score = _safe_float(primary.get("wealth_estimate"))
+
+            if avatar_task is not None:
+                avatar_url = await avatar_task
+            else:
+                avatar_url = await self.fetch_lead_avatar(session, lead)
             if avatar_url:
-                try:
-                    from modules.telemetry import logger as telemetry_logger
-
-                    telemetry_logger.info(
-                        f"Avatar baixado em {duration_ms}ms",
-                        extra={
-                            "event_type": "api",
-                            "latency_ms": duration_ms,
-                            "provider": "Evolution/Baileys",
-                        },
-                    )
-                except Exception:
-                    pass
-        if avatar_url:
-            person_payload.setdefault("primary", {})["avatar_url"] = avatar_url
-
-        return {
-            "wealth_score": wealth_score,
-            "avatar_url": avatar_url,
-            "person_json": person_payload,
-        }
+                person_payload.setdefault("primary", {})["avatar_url"] = avatar_url
+
+            return {
+                "wealth_score": wealth_score,
+                "avatar_url": avatar_url,
+                "person_json": person_payload,
+            }
+        finally:
+            # The avatar fetch runs on the shared loop; never leave it behind if this raised or returned early.
+            if avatar_task is not None and not avatar_task.done():
+                avatar_task.cancel()
@@ -7,14 +7,18 @@ from typing import Any, Dict, List, Tuple
 
 from modules.cleaning import CNAE_PRIORITARIOS
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]")
+
 
 def score_v1(lead: Dict[str, Any]) -> int:
     score = 50
-    if lead.get("flags", {}).get("cnae_priority"):
+    flags = lead.get("flags", {})
+    if flags.get("cnae_priority"):
         score += 15
     if lead.get("telefones_norm"):
         score += 10
-    if lead.get("flags", {}).get("email_domain_own"):
+    if flags.get("email_domain_own"):
         score += 10
     if (lead.get("capital_social") or 0) >= 100000:
         score += 5
@@ -63,7 +67,7 @@ def _person_primary(value: Any) -> Dict[str, Any]:
 def _normalize_token(text: str) -> str:
     decomposed = unicodedata.normalize("NFD", text or "")
     cleaned = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
-    return re.sub(r"[^a-z0-9]", "", cleaned.lower())
+    return _NON_ALNUM_RE.sub("", cleaned.lower())
 
 
 def _socios_names(value: Any) -> List[str]:
@@ -87,22 +91,34 @@ def _socios_names(value: Any) -> List[str]:
     return names
 
 
+def _name_tokens(names: List[str]) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    for name in names:
+        parts = [part for part in _WHITESPACE_RE.split(name) if part]
+        if len(parts) < 2:
+            continue
+        first = _normalize_token(parts[0])
+        last = _normalize_token(parts[-1])
+        if len(first) < 3 or len(last) < 3:
+            continue
+        tokens.append((first, last))
+    return tokens
+
+
 def partner_email_match(emails: Any, socios: Any) -> Tuple[bool, Any]:
     email_list = [str(item).strip().lower() for item in _as_list(emails) if item]
-    socio_names = _socios_names(socios)
+    if not email_list:
+        return False, None
+    # Socio names are normalized once per call rather than once per candidate email.
+    name_tokens = _name_tokens(_socios_names(socios))
+    if not name_tokens:
+        return False, None
     for email in email_list:
         local = email.split("@")[0]
         local_norm = _normalize_token(local)
         if not local_norm:
             continue
-        for name in socio_names:
-            parts = [part for part in re.split(r"\s+", name) if part]
-            if len(parts) < 2:
-                continue
-            first = _normalize_token(parts[0])
-            last = _normalize_token(parts[-1])
-            if len(first) < 3 or len(last) < 3:
-                continue
+        for first, last in name_tokens:
             if first in local_norm and last in local_norm:
                 return True, email
     return False, None
@@ -11,6 +11,13 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:  # pragma: no cover - fallback when optional deps are missing
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
 DEFAULT_DB_PATH = os.getenv("HUNTER_DB_PATH", "hunter.db")
 _SCHEMA_READY = False
 logger = logging.getLogger("hunter")
@@ -20,6 +27,26 @@ def _utcnow() -> str:
     return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def _json_dumps(value: Any) -> str:
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _json_loads(raw: Any, default: Any) -> Any:
+    if not raw:
+        return default
+    try:
+        if _ORJSON_AVAILABLE:
+            return orjson.loads(raw)
+        return json.loads(raw)
+    except Exception:
+        return default
+
+
 def get_db_path() -> str:
     env_path = os.getenv("HUNTER_DB_PATH")
     if env_path:
@@ -488,6 +515,20 @@ def log_event(level: str, event: str, detail: Optional[Dict[str, Any]] = None) -
         )
 
 
+def log_events(events: List[Tuple[str, str, str, Optional[Dict[str, Any]]]]) -> None:
+    # Each event is (created_at, level, event, detail); buffered writers stamp it when it happens.
+    if not events:
+        return
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO logs (created_at, level, event, detail_json) VALUES (?, ?, ?, ?)",
+            [
+                (created_at, level, event, json.dumps(detail or {}, ensure_ascii=False))
+                for created_at, level, event, detail in events
+            ],
+        )
+
+
 def fetch_logs(limit: int = 50, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
     with get_conn() as conn:
         if run_id:
@@ -512,7 +553,7 @@ def cache_get(key: str) -> Optional[Dict[str, Any]]:
         ).fetchone()
         if not row:
             return None
-        return json.loads(row["data"])
+        return _json_loads(row["data"], None)
 
 
 def cache_set(key: str, data: Dict[str, Any], ttl_hours: Optional[int] = 24) -> None:
@@ -522,7 +563,39 @@ def cache_set(key: str, data: Dict[str, Any], ttl_hours: Optional[int] = 24) ->
     with get_conn() as conn:
         conn.execute(
             "INSERT OR REPLACE INTO cache (key, data, created_at, expires_at) VALUES (?, ?, ?, ?)",
-            (key, json.dumps(data, ensure_ascii=False), _utcnow(), expires_at),
+            (key, _json_dumps(data), _utcnow(), expires_at),
+        )
+
+
+def cache_mget(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    keys = list(dict.fromkeys(key for key in keys if key))
+    if not keys:
+        return {}
+    placeholders = ",".join(["?"] * len(keys))
+    with get_conn() as conn:
+        rows = conn.execute(
+            f"SELECT key, data FROM cache WHERE key IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)",
+            [*keys, _utcnow()],
+        ).fetchall()
+    result: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        data = _json_loads(row["data"], None)
+        if data:
+            result[row["key"]] = data
+    return result
+
+
+def cache_mset(items: Dict[str, Dict[str, Any]], ttl_hours: Optional[int] = 24) -> None:
+    if not items:
+        return
+    expires_at = None
+    if ttl_hours:
+        expires_at = (datetime.utcnow() + timedelta(hours=ttl_hours)).strftime("%Y-%m-%d %H:%M:%S")
+    now = _utcnow()
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO cache (key, data, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            [(key, _json_dumps(data), now, expires_at) for key, data in items.items()],
         )
 
 
@@ -566,16 +639,18 @@ def insert_leads_raw(
 ) -> None:
     if not leads:
         return
-    rows = []
-    for lead in leads:
-        rows.append((
+    # A generator keeps only one serialized payload alive at a time instead of a JSON copy of the batch.
+    rows = (
+        (
             lead.get("cnpj"),
             json.dumps(lead, ensure_ascii=False),
             _utcnow(),
             source,
             run_id,
             export_uuid,
-        ))
+        )
+        for lead in leads
+    )
     with get_conn() as conn:
         conn.executemany(
             """
@@ -828,106 +903,112 @@ def upsert_leads_clean(leads: List[Dict[str, Any]]) -> None:
         )
 
 
-def upsert_enrichment(cnpj: str, data: Dict[str, Any]) -> None:
+_UPSERT_ENRICHMENT_SQL = """
+    INSERT INTO enrichments (
+        cnpj, run_id, site, instagram, linkedin_company,
+        linkedin_people_json, google_maps_url, has_contact_page,
+        has_form, tech_stack_json, tech_score, tech_confidence,
+        has_marketing, has_analytics, has_ecommerce, has_chat,
+        signals_json, fetched_url, fetch_status, fetch_ms,
+        rendered_used, contact_quality, notes, enriched_at,
+        website_confidence, discovery_method, search_term_used,
+        candidates_considered, website_match_reasons, excluded_candidates_count,
+        golden_techs_found, tech_sources, score_version, score_reasons,
+        wealth_score, avatar_url, person_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(cnpj) DO UPDATE SET
+        run_id=excluded.run_id,
+        site=excluded.site,
+        instagram=excluded.instagram,
+        linkedin_company=excluded.linkedin_company,
+        linkedin_people_json=excluded.linkedin_people_json,
+        google_maps_url=excluded.google_maps_url,
+        has_contact_page=excluded.has_contact_page,
+        has_form=excluded.has_form,
+        tech_stack_json=excluded.tech_stack_json,
+        tech_score=excluded.tech_score,
+        tech_confidence=excluded.tech_confidence,
+        has_marketing=excluded.has_marketing,
+        has_analytics=excluded.has_analytics,
+        has_ecommerce=excluded.has_ecommerce,
+        has_chat=excluded.has_chat,
+        signals_json=excluded.signals_json,
+        fetched_url=excluded.fetched_url,
+        fetch_status=excluded.fetch_status,
+        fetch_ms=excluded.fetch_ms,
+        rendered_used=excluded.rendered_used,
+        contact_quality=excluded.contact_quality,
+        notes=excluded.notes,
+        enriched_at=excluded.enriched_at,
+        website_confidence=excluded.website_confidence,
+        discovery_method=excluded.discovery_method,
+        search_term_used=excluded.search_term_used,
+        candidates_considered=excluded.candidates_considered,
+        website_match_reasons=excluded.website_match_reasons,
+        excluded_candidates_count=excluded.excluded_candidates_count,
+        golden_techs_found=excluded.golden_techs_found,
+        tech_sources=excluded.tech_sources,
+        score_version=excluded.score_version,
+        score_reasons=excluded.score_reasons,
+        wealth_score=excluded.wealth_score,
+        avatar_url=excluded.avatar_url,
+        person_json=excluded.person_json
+"""
+
+
+def _enrichment_row(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        data.get("cnpj"),
+        data.get("run_id"),
+        data.get("site"),
+        data.get("instagram"),
+        data.get("linkedin_company"),
+        _json_dumps(data.get("linkedin_people", [])),
+        data.get("google_maps_url"),
+        int(bool(data.get("has_contact_page"))),
+        int(bool(data.get("has_form"))),
+        _json_dumps(data.get("tech_stack", {})),
+        data.get("tech_score"),
+        data.get("tech_confidence"),
+        int(bool(data.get("has_marketing"))),
+        int(bool(data.get("has_analytics"))),
+        int(bool(data.get("has_ecommerce"))),
+        int(bool(data.get("has_chat"))),
+        _json_dumps(data.get("signals", {})),
+        data.get("fetched_url"),
+        data.get("fetch_status"),
+        data.get("fetch_ms"),
+        int(bool(data.get("rendered_used"))),
+        data.get("contact_quality"),
+        data.get("notes"),
+        data.get("enriched_at") or _utcnow(),
+        data.get("website_confidence"),
+        data.get("discovery_method"),
+        data.get("search_term_used"),
+        data.get("candidates_considered"),
+        _json_dumps(data.get("website_match_reasons", [])),
+        data.get("excluded_candidates_count"),
+        _json_dumps(data.get("golden_techs_found", [])),
+        _json_dumps(data.get("tech_sources", {})),
+        data.get("score_version"),
+        _json_dumps(data.get("score_reasons", [])),
+        data.get("wealth_score"),
+        data.get("avatar_url"),
+        data.get("person_json")
+        if isinstance(data.get("person_json"), str)
+        else _json_dumps(data.get("person_json", {})),
+    )
+
+
+def upsert_enrichments(items: List[Dict[str, Any]]) -> None:
+    if not items:
+        return
     _ensure_schema()
     with get_conn() as conn:
         try:
-            conn.execute(
-                """
-                INSERT INTO enrichments (
-                    cnpj, run_id, site, instagram, linkedin_company,
-                    linkedin_people_json, google_maps_url, has_contact_page,
-                    has_form, tech_stack_json, tech_score, tech_confidence,
-                    has_marketing, has_analytics, has_ecommerce, has_chat,
-                    signals_json, fetched_url, fetch_status, fetch_ms,
-                    rendered_used, contact_quality, notes, enriched_at,
-                    website_confidence, discovery_method, search_term_used,
-                    candidates_considered, website_match_reasons, excluded_candidates_count,
-                    golden_techs_found, tech_sources, score_version, score_reasons,
-                    wealth_score, avatar_url, person_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(cnpj) DO UPDATE SET
-                    run_id=excluded.run_id,
-                    site=excluded.site,
-                    instagram=excluded.instagram,
-                    linkedin_company=excluded.linkedin_company,
-                    linkedin_people_json=excluded.linkedin_people_json,
-                    google_maps_url=excluded.google_maps_url,
-                    has_contact_page=excluded.has_contact_page,
-                    has_form=excluded.has_form,
-                    tech_stack_json=excluded.tech_stack_json,
-                    tech_score=excluded.tech_score,
-                    tech_confidence=excluded.tech_confidence,
-                    has_marketing=excluded.has_marketing,
-                    has_analytics=excluded.has_analytics,
-                    has_ecommerce=excluded.has_ecommerce,
-                    has_chat=excluded.has_chat,
-                    signals_json=excluded.signals_json,
-                    fetched_url=excluded.fetched_url,
-                    fetch_status=excluded.fetch_status,
-                    fetch_ms=excluded.fetch_ms,
-                    rendered_used=excluded.rendered_used,
-                    contact_quality=excluded.contact_quality,
-                    notes=excluded.notes,
-                    enriched_at=excluded.enriched_at,
-                    website_confidence=excluded.website_confidence,
-                    discovery_method=excluded.discovery_method,
-                    search_term_used=excluded.search_term_used,
-                    candidates_considered=excluded.candidates_considered,
-                    website_match_reasons=excluded.website_match_reasons,
-                    excluded_candidates_count=excluded.excluded_candidates_count,
-                    golden_techs_found=excluded.golden_techs_found,
-                    tech_sources=excluded.tech_sources,
-                    score_version=excluded.score_version,
-                    score_reasons=excluded.score_reasons,
-                    wealth_score=excluded.wealth_score,
-                    avatar_url=excluded.avatar_url,
-                    person_json=excluded.person_json
-                """,
-                (
-                    cnpj,
-                    data.get("run_id"),
-                    data.get("site"),
-                    data.get("instagram"),
-                    data.get("linkedin_company"),
-                    json.dumps(data.get("linkedin_people", []), ensure_ascii=False),
-                    data.get("google_maps_url"),
-                    int(bool(data.get("has_contact_page"))),
-                    int(bool(data.get("has_form"))),
-                    json.dumps(data.get("tech_stack", {}), ensure_ascii=False),
-                    data.get("tech_score"),
-                    data.get("tech_confidence"),
-                    int(bool(data.get("has_marketing"))),
-                    int(bool(data.get("has_analytics"))),
-                    int(bool(data.get("has_ecommerce"))),
-                    int(bool(data.get("has_chat"))),
-                    json.dumps(data.get("signals", {}), ensure_ascii=False),
-                    data.get("fetched_url"),
-                    data.get("fetch_status"),
-                    data.get("fetch_ms"),
-                    int(bool(data.get("rendered_used"))),
-                    data.get("contact_quality"),
-                    data.get("notes"),
-                    data.get("enriched_at") or _utcnow(),
-                    data.get("website_confidence"),
-                    data.get("discovery_method"),
-                    data.get("search_term_used"),
-                    data.get("candidates_considered"),
-                    json.dumps(data.get("website_match_reasons", []), ensure_ascii=False),
-                    data.get("excluded_candidates_count"),
-                    json.dumps(data.get("golden_techs_found", []), ensure_ascii=False),
-                    json.dumps(data.get("tech_sources", {}), ensure_ascii=False),
-                    data.get("score_version"),
-                    json.dumps(data.get("score_reasons", []), ensure_ascii=False),
-                    data.get("wealth_score"),
-                    data.get("avatar_url"),
-                    data.get("person_json")
-                    if isinstance(data.get("person_json"), str)
-                    else json.dumps(data.get("person_json", {}), ensure_ascii=False),
-                ),
-            )
+            conn.executemany(_UPSERT_ENRICHMENT_SQL, [_enrichment_row(item) for item in items])
         except sqlite3.OperationalError as exc:
-            logger.exception("upsert_enrichment failed (cnpj=%s): %s", cnpj, exc)
+            logger.exception("upsert_enrichments failed (%s items): %s", len(items), exc)
             raise
 
 
@@ -1164,14 +1245,24 @@ def record_webhook_delivery(
     status: str,
     response_code: Optional[int],
 ) -> None:
+    record_webhook_deliveries(run_id, [(lead_cnpj, status, response_code)])
+
+
+def record_webhook_deliveries(
+    run_id: Optional[str],
+    deliveries: List[Tuple[Optional[str], str, Optional[int]]],
+) -> None:
+    if not deliveries:
+        return
+    now = _utcnow()
     with get_conn() as conn:
-        conn.execute(
+        conn.executemany(
             """
             INSERT INTO webhook_deliveries
             (run_id, lead_cnpj, status, response_code, timestamp)
             VALUES (?, ?, ?, ?, ?)
             """,
-            (run_id, lead_cnpj, status, response_code, _utcnow()),
+            [(run_id, lead_cnpj, status, response_code, now) for lead_cnpj, status, response_code in deliveries],
         )
 
 
@@ -1412,21 +1503,63 @@ def count_enrichments() -> int:
     return int(row["cnt"])
 
 
-def fetch_enrichments_by_cnpjs(cnpjs: List[str]) -> Dict[str, Dict[str, Any]]:
+def fetch_enrichments_by_cnpjs(
+    cnpjs: List[str], fresh_since: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
     if not cnpjs:
         return {}
     placeholders = ",".join(["?"] * len(cnpjs))
+    query = f"SELECT * FROM enrichments WHERE cnpj IN ({placeholders})"
+    params: List[Any] = list(cnpjs)
+    if fresh_since:
+        query += " AND enriched_at >= ?"
+        params.append(fresh_since)
     with get_conn() as conn:
-        rows = conn.execute(
-            f"SELECT * FROM enrichments WHERE cnpj IN ({placeholders})",
-            cnpjs,
-        ).fetchall()
+        rows = conn.execute(query, params).fetchall()
     result: Dict[str, Dict[str, Any]] = {}
     for row in rows:
         result[row["cnpj"]] = dict(row)
     return result
 
 
+def fetch_enrichment_results_by_cnpjs(
+    cnpjs: List[str], fresh_since: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    # Filtering stale rows in SQL keeps their JSON columns from being parsed at all.
+    rows = fetch_enrichments_by_cnpjs(cnpjs, fresh_since=fresh_since)
+    result: Dict[str, Dict[str, Any]] = {}
+    for cnpj, row in rows.items():
+        result[cnpj] = {
+            "cnpj": row.get("cnpj"),
+            "site": row.get("site"),
+            "instagram": row.get("instagram"),
+            "linkedin_company": row.get("linkedin_company"),
+            "linkedin_people": _json_loads(row.get("linkedin_people_json"), []),
+            "google_maps_url": row.get("google_maps_url"),
+            "has_contact_page": bool(row.get("has_contact_page")),
+            "has_form": bool(row.get("has_form")),
+            "tech_stack": _json_loads(row.get("tech_stack_json"), {}),
+            "tech_score": int(row.get("tech_score") or 0),
+            "tech_confidence": int(row.get("tech_confidence") or 0),
+            "has_marketing": bool(row.get("has_marketing")),
+            "has_analytics": bool(row.get("has_analytics")),
+            "has_ecommerce": bool(row.get("has_ecommerce")),
+            "has_chat": bool(row.get("has_chat")),
+            "signals": _json_loads(row.get("signals_json"), {}),
+            "fetched_url": row.get("fetched_url"),
+            "fetch_status": row.get("fetch_status"),
+            "fetch_ms": row.get("fetch_ms") or 0,
+            "rendered_used": bool(row.get("rendered_used")),
+            "contact_quality": row.get("contact_quality"),
+            "notes": row.get("notes"),
+            "wealth_score": row.get("wealth_score") or 0,
+            "avatar_url": row.get("avatar_url"),
+            "person_json": _json_loads(row.get("person_json"), {}),
+            "enriched_at": row.get("enriched_at"),
+        }
+    return result
+
+
 def fetch_socios_by_cnpjs(cnpjs: List[str]) -> Dict[str, List[Dict[str, Any]]]:
     if not cnpjs:
         return {}
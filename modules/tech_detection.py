@@ -176,6 +176,22 @@ GOLDEN_TECHS = {
 
 TRANSIENT_STATUS = {429, 500, 502, 503, 504}
 
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", str(256 * 1024)))
+HTML_CHUNK_BYTES = 16 * 1024
+
+
+async def read_capped_text(resp: aiohttp.ClientResponse, max_bytes: int = HTML_MAX_BYTES) -> str:
+    buf = bytearray()
+    async for chunk in resp.content.iter_chunked(HTML_CHUNK_BYTES):
+        buf.extend(chunk)
+        if len(buf) >= max_bytes:
+            del buf[max_bytes:]
+            break
+    try:
+        return buf.decode(resp.charset or "utf-8", errors="ignore")
+    except LookupError:
+        return buf.decode("utf-8", errors="ignore")
+
 
 def _extract_script_srcs(html: str) -> List[str]:
     if not html:
@@ -201,20 +217,69 @@ def _normalize_url_candidates(url: str) -> List[str]:
     return list(dict.fromkeys(candidates))
 
 
-def _regex_search(patterns: Iterable[str], text: str) -> List[str]:
-    matches = []
+_REGEX_META = frozenset(".^$*+?{}[]|()")
+
+
+def _pattern_literal(pattern: str) -> Optional[str]:
+    # Returns the lowercased literal when the pattern has no regex syntax beyond escaped punctuation.
+    chars: List[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            escaped = pattern[index + 1 : index + 2]
+            if not escaped or escaped.isalnum():
+                return None
+            chars.append(escaped)
+            index += 2
+            continue
+        if char in _REGEX_META:
+            return None
+        chars.append(char)
+        index += 1
+    return "".join(chars).lower()
+
+
+Matcher = Tuple[str, Optional[str], Optional["re.Pattern[str]"]]
+
+
+def _compile_patterns(patterns: Iterable[str]) -> List[Matcher]:
+    matchers: List[Matcher] = []
     for pat in patterns:
         if not pat:
             continue
+        literal = _pattern_literal(pat)
+        if literal is not None:
+            matchers.append((pat, literal, None))
+            continue
         try:
-            if re.search(pat, text, re.IGNORECASE):
-                matches.append(pat)
+            matchers.append((pat, None, re.compile(pat, re.IGNORECASE)))
         except re.error:
-            if pat.lower() in text.lower():
+            matchers.append((pat, pat.lower(), None))
+    return matchers
+
+
+def _match_patterns(matchers: List[Matcher], text: str) -> List[str]:
+    # Callers pass lowercased blobs, so literal patterns can use a plain substring test.
+    matches = []
+    for pat, literal, regex in matchers:
+        if literal is not None:
+            if literal in text:
                 matches.append(pat)
+        elif regex.search(text):
+            matches.append(pat)
     return matches
 
 
+_SIGNATURE_MATCHERS: Dict[str, Dict[str, List[Matcher]]] = {
+    tech: {
+        kind: _compile_patterns(sig.get(kind, []))
+        for kind in ("script_src", "html", "headers", "cookies")
+    }
+    for tech, sig in TECH_SIGNATURES.items()
+}
+
+
 def _cookie_names(cookie_headers: List[str]) -> List[str]:
     names = []
     for header in cookie_headers:
@@ -249,7 +314,7 @@ class TechSniperDetector:
             try:
                 start = time.time()
                 async with session.get(url, allow_redirects=True, max_redirects=self.max_redirects, timeout=self.timeout) as resp:
-                    text = await resp.text()
+                    text = await read_capped_text(resp)
                     fetch_ms = int((time.time() - start) * 1000)
                     if resp.status in TRANSIENT_STATUS and attempt < self.retries:
                         last_error = f"status:{resp.status}"
@@ -309,28 +374,29 @@ class TechSniperDetector:
         categories_found: Dict[str, bool] = {key: False for key in CATEGORY_POINTS}
 
         for tech, sig in TECH_SIGNATURES.items():
+            matchers = _SIGNATURE_MATCHERS[tech]
             evidence: List[str] = []
             matched_types = set()
 
-            script_matches = _regex_search(sig.get("script_src", []), script_blob)
+            script_matches = _match_patterns(matchers["script_src"], script_blob)
             if script_matches:
                 for match in script_matches:
                     evidence.append(f"script_src:{match}")
                 matched_types.add("script_src")
 
-            html_matches = _regex_search(sig.get("html", []), html_lower)
+            html_matches = _match_patterns(matchers["html"], html_lower)
             if html_matches:
                 for match in html_matches:
                     evidence.append(f"html:{match}")
                 matched_types.add("html")
 
-            header_matches = _regex_search(sig.get("headers", []), header_blob)
+            header_matches = _match_patterns(matchers["headers"], header_blob)
             if header_matches:
                 for match in header_matches:
                     evidence.append(f"header:{match}")
                 matched_types.add("header")
 
-            cookie_matches = _regex_search(sig.get("cookies", []), cookie_blob)
+            cookie_matches = _match_patterns(matchers["cookies"], cookie_blob)
             if cookie_matches:
                 for match in cookie_matches:
                     evidence.append(f"cookie:{match}")
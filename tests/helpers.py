@@ -0,0 +1,17 @@
+import contextlib
+import os
+import tempfile
+from typing import Iterator
+from unittest import mock
+
+from modules import storage
+
+
+@contextlib.contextmanager
+def temp_database() -> Iterator[str]:
+    # storage resolves HUNTER_DB_PATH on every connection, so patching the env is enough.
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "hunter.db")
+        with mock.patch.dict(os.environ, {"HUNTER_DB_PATH": db_path}):
+            storage.init_db()
+            yield db_path
@@ -1,6 +1,12 @@
+import asyncio
+import socket
+import time
 import unittest
+from unittest import mock
 
 from modules import enrichment_async as ea
+from modules.person_intelligence import PersonIntelligence
+from helpers import temp_database
 
 
 class DiscoveryTests(unittest.TestCase):
@@ -33,6 +39,287 @@ class DiscoveryTests(unittest.TestCase):
         self.assertGreaterEqual(score, 60)
         self.assertIn("brand_match", reasons)
 
+    def test_scan_html_signals(self) -> None:
+        self.assertEqual(
+            ea._scan_html_signals('<FORM></FORM><a href="https://api.whatsapp.com/send">'),
+            (True, True),
+        )
+        self.assertEqual(ea._scan_html_signals('<a href="https://wa.me/5544999999999">'), (False, True))
+        self.assertEqual(ea._scan_html_signals("<div>formulario</div>"), (False, False))
+        self.assertEqual(ea._scan_html_signals(""), (False, False))
+
+    def test_coalesced_runs_factory_once(self) -> None:
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return {"title": "Acme"}
+
+        async def run():
+            inflight = {}
+            return await asyncio.gather(*[ea._coalesced(inflight, "acme.com.br", factory) for _ in range(3)])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([item["title"] for item in results], ["Acme"] * 3)
+
+    def test_sanitize_error_message_masks_api_key(self) -> None:
+        message = ea._sanitize_error_message("GET https://x?api_key=abcsecret&q=1 failed")
+        self.assertEqual(message, "GET https://x?api_key=***&q=1 failed")
+
+    def test_extract_title_and_meta(self) -> None:
+        html = (
+            "<html><head><TITLE> Acme &amp; Filhos </TITLE>"
+            "<meta content='Loja de ferramentas' name=\"description\">"
+            '<meta property="og:site_name" content="Acme"></head></html>'
+        )
+        self.assertEqual(ea._extract_title(html), "Acme & Filhos")
+        metas = ea._extract_meta(html)
+        self.assertEqual(metas.get(("name", "description")), "Loja de ferramentas")
+        self.assertEqual(metas.get(("property", "og:site_name")), "Acme")
+        self.assertEqual(ea._head_html(html + "<body><meta name='x'></body>"), html[: html.index("</head>")])
+        self.assertEqual(ea._head_html("<p>sem head</p>"), "<p>sem head</p>")
+
+    def test_rate_limiter_reserves_slots_in_order(self) -> None:
+        limiter = ea.RateLimiter(50, burst=2)
+        order = []
+
+        async def worker(idx):
+            await limiter.acquire()
+            order.append(idx)
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(worker(i) for i in range(5)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(main())
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertGreaterEqual(elapsed, 0.05)
+
+    def test_search_uses_batch_cache(self) -> None:
+        calls = []
+
+        class Provider:
+            name = "fake"
+
+            async def search(self, session, query):
+                calls.append(query)
+                return {"candidates": []}
+
+        enricher = ea.AsyncEnricher(Provider(), concurrency=1, timeout=1, cache_ttl_hours=1)
+        enricher._search_cache = {ea._search_cache_key("cached"): {"candidates": [{"url": "https://acme.com.br"}]}}
+
+        async def main():
+            hit = await enricher._search(None, "cached")
+            await asyncio.gather(enricher._search(None, "novo"), enricher._search(None, "novo"))
+            await enricher._search(None, "novo")
+            return hit
+
+        hit = asyncio.run(main())
+        self.assertEqual(hit["candidates"][0]["url"], "https://acme.com.br")
+        self.assertEqual(calls, ["novo"])
+        self.assertIn(ea._search_cache_key("novo"), enricher._search_writes)
+
+    def test_linkedin_people_search_leaves_cached_payload_untouched(self) -> None:
+        class Provider:
+            name = "fake"
+
+            async def search(self, session, query):
+                return {
+                    "linkedin_people": ["https://linkedin.com/in/a"],
+                    "candidates": [{"url": "https://linkedin.com/in/b?x=1"}],
+                }
+
+        enricher = ea.AsyncEnricher(Provider(), concurrency=1, timeout=1, cache_ttl_hours=1)
+        enricher._search_cache = {}
+        lead = {"razao_social": "Acme Ltda"}
+
+        async def main():
+            return [await enricher._search_linkedin_people(None, lead, ["Maria Silva"]) for _ in range(3)]
+
+        found = asyncio.run(main())
+        self.assertEqual(found, [["https://linkedin.com/in/a", "https://linkedin.com/in/b"]] * 3)
+        self.assertEqual(
+            [payload["linkedin_people"] for payload in enricher._search_writes.values()],
+            [["https://linkedin.com/in/a"]],
+        )
+
+    def test_dns_valid_uses_ttl_cache(self) -> None:
+        with mock.patch.dict(ea._DNS_CACHE, {"cached.invalid": (True, time.monotonic() + 60)}):
+            self.assertTrue(asyncio.run(ea._dns_valid("cached.invalid")))
+        self.assertFalse(asyncio.run(ea._dns_valid("")))
+
+    def test_dns_valid_retries_transient_failures_sooner(self) -> None:
+        async def main(error):
+            loop = asyncio.get_running_loop()
+            with mock.patch.object(loop, "getaddrinfo", side_effect=error):
+                return await ea._dns_valid("flaky.invalid")
+
+        with mock.patch.dict(ea._DNS_CACHE, clear=True):
+            now = time.monotonic()
+            self.assertFalse(asyncio.run(main(socket.gaierror(socket.EAI_AGAIN, "again"))))
+            self.assertLessEqual(ea._DNS_CACHE["flaky.invalid"][1], time.monotonic() + ea.DNS_RETRY_TTL_SEC)
+            ea._DNS_CACHE.clear()
+            self.assertFalse(asyncio.run(main(socket.gaierror(socket.EAI_NONAME, "unknown"))))
+            self.assertGreater(ea._DNS_CACHE["flaky.invalid"][1], now + ea.DNS_RETRY_TTL_SEC)
+
+    def test_normalize_company_text_drops_stopwords(self) -> None:
+        self.assertEqual(ea._normalize_company_text("Acme Pecas e Servicos LTDA"), ("acme", "pecas", "servicos"))
+        self.assertEqual(ea._title_similarity("Acme Ferramentas", "ACME FERRAMENTAS LTDA"), 1.0)
+
+    def test_run_bounded_limits_concurrency_and_stops(self) -> None:
+        seen = []
+        active = [0, 0]
+
+        async def worker(item):
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+            await asyncio.sleep(0)
+            seen.append(item)
+            active[0] -= 1
+
+        asyncio.run(ea._run_bounded(list(range(20)), worker, 3, should_stop=lambda: len(seen) >= 6))
+        self.assertLessEqual(active[1], 3)
+        self.assertLess(len(seen), 20)
+
+    def test_contact_urls_are_deduplicated(self) -> None:
+        self.assertEqual(
+            ea._contact_urls("https://acme.com.br/sobre"),
+            ("https://acme.com.br/contato", "https://acme.com.br/fale-conosco", "https://acme.com.br/contact"),
+        )
+
+    def test_contact_probe_skips_exhausted_host(self) -> None:
+        enricher = ea.AsyncEnricher(None)
+        enricher._contact_url_by_host["acme.com.br"] = None
+        self.assertIsNone(asyncio.run(enricher._probe_contact_page(None, "https://acme.com.br/sobre")))
+
+    def test_adaptive_limiter_retires_permits(self) -> None:
+        async def main():
+            limiter = ea.AdaptiveLimiter(2)
+            await limiter.acquire()
+            await limiter.acquire()
+            await limiter.reduce()
+            limiter._pause_until = 0.0
+            limiter.release()
+            limiter.release()
+            await limiter.acquire()
+            return limiter._semaphore.locked()
+
+        self.assertTrue(asyncio.run(main()))
+
+    def test_fetch_wait_honours_retry_after(self) -> None:
+        wait = ea._fetch_wait(0.5, 10.0)
+        next(wait)
+        throttled = ea.aiohttp.ClientResponseError(None, (), status=429, headers={"Retry-After": "30"})
+        self.assertEqual(wait.send(throttled), 10.0)
+        self.assertLessEqual(wait.send(ea.aiohttp.ClientError()), 1.0)
+
+    def test_contact_analysis_is_memoized(self) -> None:
+        enricher = ea.AsyncEnricher(None)
+        calls = []
+        analyze = enricher.detector.analyze_content
+        enricher.detector.analyze_content = lambda *args: calls.append(args) or analyze(*args)
+        html = "<script src='https://js.hs-scripts.com/1.js'></script>"
+        first = enricher._analyze_content_cached(html)
+        second = enricher._analyze_content_cached(html)
+        self.assertIs(first, second)
+        self.assertIn("hubspot", first["detected_stack"])
+        self.assertEqual(len(calls), 1)
+
+    def test_avatar_task_cancelled_when_detection_fails(self) -> None:
+        enricher = ea.AsyncEnricher(None)
+        tasks = []
+
+        async def slow_avatar(session, lead):
+            await asyncio.sleep(60)
+
+        async def discover(session, lead):
+            return {"website_url": "https://acme.com.br"}
+
+        async def broken_detect(*args, **kwargs):
+            raise RuntimeError("detector down")
+
+        def start_avatar(person_intel, session, lead):
+            tasks.append(asyncio.create_task(slow_avatar(session, lead)))
+            return tasks[-1]
+
+        async def main():
+            with self.assertRaises(RuntimeError):
+                await enricher._enrich_one(None, {"cnpj": "1"}, "run")
+            await asyncio.sleep(0)
+            return tasks[0].cancelled()
+
+        with (
+            mock.patch.object(enricher, "_discover_website", discover),
+            mock.patch.object(enricher.detector, "detect", broken_detect),
+            mock.patch.object(ea, "_start_avatar_fetch", start_avatar),
+        ):
+            self.assertTrue(asyncio.run(main()))
+
+    def test_dns_prewarm_honours_cancel_and_timeout(self) -> None:
+        leads = [{"cnpj": "1", "email": "contato@acme.com.br"}, {"cnpj": "2", "email": "vendas@beta.com.br"}]
+        calls = []
+
+        async def main(cancel_first: bool):
+            cancel_event = asyncio.Event()
+            if cancel_first:
+                cancel_event.set()
+
+            async def hanging_dns(domain):
+                calls.append(domain)
+                cancel_event.set()
+                await asyncio.sleep(60)
+
+            enricher = ea.AsyncEnricher(None, concurrency=1)
+            try:
+                with mock.patch.object(ea, "_dns_valid", hanging_dns):
+                    return await enricher.enrich_batch(leads, "run", cancel_event=cancel_event)
+            finally:
+                await enricher.close()
+
+        with temp_database(), mock.patch.object(ea, "DNS_PREWARM_TIMEOUT_SEC", 0.05):
+            asyncio.run(main(cancel_first=True))
+            self.assertEqual(calls, [])
+            started = time.monotonic()
+            results, _ = asyncio.run(main(cancel_first=False))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [])
+
+    def test_person_intel_cancels_avatar_task_on_failure(self) -> None:
+        intel = PersonIntelligence()
+        lead = {"socios": [{"nome": "Maria Silva"}]}
+
+        async def main():
+            avatar_task = asyncio.create_task(asyncio.sleep(60))
+            with mock.patch.object(intel, "_build_person_payload", side_effect=RuntimeError("payload")):
+                with self.assertRaises(RuntimeError):
+                    await intel.enrich(None, lead, avatar_task=avatar_task)
+            await asyncio.sleep(0)
+            return avatar_task.cancelled()
+
+        self.assertTrue(asyncio.run(main()))
+
+    def test_stop_background_loop_closes_shared_connectors(self) -> None:
+        async def open_connector():
+            return ea._shared_connector(2)
+
+        connector = ea.run_in_background(open_connector())
+        loop = ea._background_loop
+        ea._stop_background_loop()
+        self.assertTrue(connector.closed)
+        self.assertTrue(loop.is_closed())
+        self.assertIsNone(ea._background_loop)
+        self.assertEqual(ea._background_connectors, {})
+        ea._stop_background_loop()
+
+    def test_pick_email_handles_json_string(self) -> None:
+        self.assertEqual(ea._pick_email({"emails_norm": '["contato@acme.com.br"]'}), "contato@acme.com.br")
+        self.assertEqual(ea._pick_email({"emails_norm": [], "email": "a@b.com"}), "a@b.com")
+        self.assertIsNone(ea._pick_email({}))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from modules import exports
+
+
+_ROWS = [
+    {
+        "cnpj": "11222333000181",
+        "razao_social": "Acme Ltda",
+        "municipio": "Maringa",
+        "telefones_norm": '["44999990000", "(44) 3030-1010"]',
+        "emails_norm": ["contato@acme.com.br", "vendas@acme.com.br"],
+        "socios_json": '[{"nome_socio": "MARIA SILVA", "qualificacao": "Socio-Administrador", "cpf": "***111***"}]',
+        "flags_json": '{"whatsapp_probable": true, "has_site": true, "mei": false}',
+        "tech_stack_json": '{"detected_stack": ["hubspot", "wordpress"]}',
+        "score_reasons": '["site ativo", "whatsapp"]',
+        "score_v2": 80,
+        "wealth_score": None,
+    },
+    {
+        "cnpj": "44555666000199",
+        "telefones_norm": ["5544988887777", None, "44 3333-2222"],
+        "emails_norm": "solo@beta.com",
+        "socios_json": [{"nome": "joao", "cpf": "***999***"}],
+        "flags_json": '{"whatsapp_probable": true, "has_site": true, "mei": false}',
+        "person_json": '{"primary": {"linkedin_profile": "https://linkedin.com/in/joao", "wealth_estimate": 42}}',
+        "linkedin_people_json": '["https://linkedin.com/in/outro"]',
+        "score_v2": 55,
+    },
+    {
+        "cnpj": "77888999000100",
+        "telefones_norm": "",
+        "emails_norm": None,
+        "flags_json": {"whatsapp_probable": False, "mei": True},
+        "linkedin_people_json": ["https://linkedin.com/in/ana"],
+        "golden_techs_found": ["rd station", ""],
+    },
+]
+_SOCIOS_MAP = {"44555666000199": [{"nome_socio": "JOAO SOUZA", "qualificacao": "Socio", "cpf": "***456***"}]}
+
+
+class ExportsTests(unittest.TestCase):
+    def test_format_export_data_mixed_json_and_list_inputs(self) -> None:
+        df = exports.format_export_data(_ROWS, _SOCIOS_MAP)
+        self.assertEqual(
+            df["Link WhatsApp"].tolist(),
+            ["https://wa.me/5544999990000", "https://wa.me/5544988887777", ""],
+        )
+        self.assertEqual(
+            df["Telefones"].tolist(),
+            ["44999990000, 4430301010", "5544988887777, 4433332222", ""],
+        )
+        self.assertEqual(
+            df["E-mails"].tolist(),
+            ["contato@acme.com.br, vendas@acme.com.br", "solo@beta.com", ""],
+        )
+        self.assertEqual(df["socios"].tolist(), ["Maria Silva (Socio-Administrador)", "Joao Souza (Socio)", ""])
+        self.assertEqual(df["cpf"].tolist(), ["", "***456***", ""])
+        self.assertEqual(df["whatsapp_probable"].tolist(), ["true", "true", ""])
+        self.assertEqual(
+            df["flags achatadas"].tolist(),
+            ["has_site, whatsapp_probable", "has_site, whatsapp_probable", "mei"],
+        )
+        self.assertEqual(
+            df["linkedin_profile"].tolist(),
+            ["", "https://linkedin.com/in/joao", "https://linkedin.com/in/ana"],
+        )
+        self.assertEqual(df["wealth_score"].tolist(), ["", 42, ""])
+        self.assertEqual(df["Stack Tecnol\u00f3gico"].tolist(), ["hubspot, wordpress", "", ""])
+        self.assertEqual(df["score_reasons"].tolist(), ["site ativo, whatsapp", "", ""])
+        self.assertEqual(df["golden_techs_found"].tolist(), ["", "", "rd station"])
+        self.assertEqual(df["cidade"].tolist(), ["Maringa", "", ""])
+
+    def test_format_export_data_empty_and_missing_columns(self) -> None:
+        self.assertTrue(exports.format_export_data([]).empty)
+        df = exports.format_export_data([{"cnpj": "1"}], mode="debug")
+        self.assertEqual(df.columns[0], "cnpj")
+        self.assertIn("tech_sources", df.columns)
+        record = df.to_dict("records")[0]
+        self.assertEqual(record.pop("cnpj"), "1")
+        self.assertEqual(set(record.values()), {""})
+
+    def test_webhook_retries_ignore_retry_after(self) -> None:
+        hits = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                hits.append(self.path)
+                self.send_response(429)
+                self.send_header("Retry-After", "3600")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+        try:
+            started = time.monotonic()
+            with mock.patch.object(exports.storage, "record_webhook_deliveries") as record:
+                result = exports.send_batch_to_webhook([{"cnpj": "1", "run_id": "run-1"}], url, timeout=5)
+            elapsed = time.monotonic() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertLess(elapsed, 30)
+        self.assertEqual(len(hits), exports.WEBHOOK_MAX_RETRIES + 1)
+        self.assertEqual(result, {"sent": 0, "failed": 1, "batches": 1})
+        record.assert_called_once_with("run-1", [("1", "error", 429)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from modules import jobs, scoring, storage
+from helpers import temp_database
+
+
+class JobsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.enterContext(temp_database())
+        # Cleanups run last-in first-out, so queued log events reach this test's database.
+        self.addCleanup(jobs.flush_log_events)
+
+    def test_log_events_keep_enqueue_order_and_time(self) -> None:
+        stamps = iter(["2026-01-01 00:00:01", "2026-01-01 00:00:02", "2026-01-01 00:00:03"])
+        with mock.patch.object(storage, "_utcnow", side_effect=stamps):
+            for index in range(3):
+                jobs._log_info("run-1", "step", f"event {index}", index=index)
+        jobs.flush_log_events()
+        with storage.get_conn() as conn:
+            rows = conn.execute("SELECT created_at, detail_json FROM logs ORDER BY id").fetchall()
+        self.assertEqual(
+            [row["created_at"] for row in rows],
+            ["2026-01-01 00:00:01", "2026-01-01 00:00:02", "2026-01-01 00:00:03"],
+        )
+        self.assertEqual(len(storage.fetch_logs(limit=10, run_id="run-1")), 3)
+
+    def test_broken_cpu_pool_falls_back_and_is_rebuilt(self) -> None:
+        class BrokenPool:
+            shut_down = False
+
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker died"))
+                return future
+
+            def shutdown(self, wait=True, cancel_futures=False):
+                self.shut_down = True
+
+        broken = BrokenPool()
+        raw = [{"cnpj": "11222333000181", "razao_social": "Acme Ltda", "cnae": "8211"}]
+        with mock.patch.object(jobs, "CPU_OFFLOAD", True), mock.patch.object(jobs, "_cpu_pool", broken):
+            cleaned, stats = jobs._run_clean_and_score("run-1", raw, True, 5)
+            self.assertIsNone(jobs._cpu_pool)
+        self.assertTrue(broken.shut_down)
+        self.assertEqual((cleaned, stats), jobs._clean_and_score(raw, True, 5))
+        self.assertIn("score_v1", cleaned[0])
+        jobs.flush_log_events()
+        events = [row["event"] for row in storage.fetch_logs(limit=10, run_id="run-1")]
+        self.assertIn("cpu_offload_failed", events)
+
+    def test_warm_cpu_pool_resets_broken_pool(self) -> None:
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool("worker died")
+        with mock.patch.object(jobs, "CPU_OFFLOAD", True), mock.patch.object(jobs, "_cpu_pool", broken):
+            jobs._warm_cpu_pool()
+            self.assertIsNone(jobs._cpu_pool)
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    def test_cleaned_leads_written_once_and_kept_on_step_failure(self) -> None:
+        raw = [{"cnpj": "11222333000181", "razao_social": "Acme Ltda", "cnae": "8211"}]
+        params = {"excluir_mei": True, "telefone_repeat_threshold": 5, "enable_enrichment": False}
+        upsert = mock.Mock(wraps=storage.upsert_leads_clean)
+        with mock.patch.object(storage, "upsert_leads_clean", upsert):
+            jobs._process_leads(storage.create_run(params), params, raw, threading.Event())
+            self.assertEqual(upsert.call_count, 1)
+            with mock.patch.object(storage, "record_run_step", side_effect=RuntimeError("db busy")):
+                with self.assertRaises(RuntimeError):
+                    jobs._process_leads(storage.create_run(params), params, raw, threading.Event())
+        self.assertEqual(upsert.call_count, 2)
+        self.assertEqual([row["cnpj"] for row in storage.fetch_leads_clean()], ["11222333000181"])
+
+    def test_cleaned_leads_survive_scoring_v2_failure(self) -> None:
+        run_id = storage.create_run({"enable_enrichment": False})
+        raw = [{"cnpj": "11222333000181", "razao_social": "Acme Ltda", "cnae": "8211"}]
+        params = {"excluir_mei": True, "telefone_repeat_threshold": 5, "enable_enrichment": False}
+        with mock.patch.object(scoring, "score_with_reasons", side_effect=RuntimeError("scoring down")):
+            with self.assertRaises(RuntimeError):
+                jobs._process_leads(run_id, params, raw, threading.Event())
+        rows = storage.fetch_leads_clean()
+        self.assertEqual([row["cnpj"] for row in rows], ["11222333000181"])
+        self.assertIsNotNone(rows[0]["score_v1"])
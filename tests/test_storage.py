@@ -0,0 +1,48 @@
+import unittest
+
+from modules import storage
+from helpers import temp_database
+
+
+class StorageTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.enterContext(temp_database())
+
+    def test_upsert_enrichments_round_trip_with_freshness(self) -> None:
+        storage.upsert_enrichments(
+            [
+                {
+                    "cnpj": "1",
+                    "site": "https://acme.com.br",
+                    "tech_stack": {"detected_stack": ["hubspot"]},
+                    "has_form": True,
+                    "enriched_at": "2026-01-10 12:00:00",
+                },
+                {"cnpj": "2", "site": "https://old.com.br", "enriched_at": "2025-01-01 00:00:00"},
+            ]
+        )
+        storage.upsert_enrichments([{"cnpj": "1", "site": "https://acme.com", "enriched_at": "2026-01-11 08:00:00"}])
+        storage.upsert_enrichments([])
+
+        rows = storage.fetch_enrichments_by_cnpjs(["1", "2", "3"])
+        self.assertEqual(sorted(rows), ["1", "2"])
+        self.assertEqual(rows["1"]["site"], "https://acme.com")
+        self.assertEqual(rows["1"]["has_form"], 0)
+
+        fresh = storage.fetch_enrichments_by_cnpjs(["1", "2"], fresh_since="2026-01-01 00:00:00")
+        self.assertEqual(list(fresh), ["1"])
+        results = storage.fetch_enrichment_results_by_cnpjs(["1", "2"], fresh_since="2026-01-01 00:00:00")
+        self.assertEqual(results["1"]["site"], "https://acme.com")
+
+    def test_record_webhook_deliveries_writes_batch(self) -> None:
+        storage.record_webhook_deliveries("run-1", [("1", "sent", 200), ("2", "failed", 500)])
+        storage.record_webhook_delivery("run-2", "3", "failed", None)
+        storage.record_webhook_deliveries("run-1", [])
+
+        rows = storage.fetch_webhook_deliveries("run-1")
+        self.assertEqual(
+            [(row["lead_cnpj"], row["status"], row["response_code"]) for row in rows],
+            [("2", "failed", 500), ("1", "sent", 200)],
+        )
+        self.assertEqual(len({row["timestamp"] for row in rows}), 1)
+        self.assertEqual(len(storage.fetch_webhook_deliveries()), 3)